@@ -0,0 +1,119 @@
+"""Add landlord stats
+
+Revision ID: 0b5e3f9a7c21
+Revises: f2c8b7d41e96
+Create Date: 2026-10-17 17:03:48.517290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b5e3f9a7c21'
+down_revision = 'f2c8b7d41e96'
+branch_labels = None
+depends_on = None
+
+OWED = (
+    'CASE WHEN NOT {row}payment_status THEN {row}monthly_price '
+    'WHEN {row}price < {row}monthly_price THEN {row}monthly_price - {row}price ELSE 0 END'
+)
+
+
+def payment(row, sign):
+    return (
+        f'UPDATE landlord_stats SET payments = payments {sign} 1, '
+        f'unpaid_payments = unpaid_payments {sign} (NOT {row}.payment_status), '
+        f"outstanding = outstanding {sign} {OWED.format(row=row + '.')} "
+        f'WHERE landlord_id = (SELECT landlord_id FROM rental_buildings WHERE id = {row}.rental_building_id);'
+    )
+
+
+def count(column, landlord, sign):
+    return f'UPDATE landlord_stats SET {column} = {column} {sign} 1 WHERE landlord_id = {landlord};'
+
+
+def building_payments(landlord, building, sign):
+    return (
+        f'UPDATE landlord_stats SET '
+        f'payments = payments {sign} (SELECT count(*) FROM payments WHERE rental_building_id = {building}), '
+        f'unpaid_payments = unpaid_payments {sign} (SELECT count(*) FROM payments WHERE rental_building_id = {building} AND NOT payment_status), '
+        f"outstanding = outstanding {sign} (SELECT coalesce(sum({OWED.format(row='')}), 0) FROM payments WHERE rental_building_id = {building}) "
+        f'WHERE landlord_id = {landlord};'
+    )
+
+
+TRIGGERS = {
+    'landlord_stats_landlords_ai': (
+        'AFTER INSERT ON landlords',
+        'INSERT OR IGNORE INTO landlord_stats (landlord_id, tenants, rental_buildings, property_types, payments, '
+        'unpaid_payments, outstanding) VALUES (new.id, 0, 0, 0, 0, 0, 0);'
+    ),
+    'landlord_stats_landlords_ad': ('AFTER DELETE ON landlords', 'DELETE FROM landlord_stats WHERE landlord_id = old.id;'),
+    'landlord_stats_tenants_ai': ('AFTER INSERT ON tenants', count('tenants', 'new.landlord_id', '+')),
+    'landlord_stats_tenants_ad': ('AFTER DELETE ON tenants', count('tenants', 'old.landlord_id', '-')),
+    'landlord_stats_tenants_au': (
+        'AFTER UPDATE OF landlord_id ON tenants',
+        count('tenants', 'old.landlord_id', '-') + ' ' + count('tenants', 'new.landlord_id', '+')
+    ),
+    'landlord_stats_rental_buildings_ai': ('AFTER INSERT ON rental_buildings', count('rental_buildings', 'new.landlord_id', '+')),
+    'landlord_stats_rental_buildings_ad': ('AFTER DELETE ON rental_buildings', count('rental_buildings', 'old.landlord_id', '-')),
+    'landlord_stats_rental_buildings_au': (
+        'AFTER UPDATE OF landlord_id ON rental_buildings',
+        ' '.join([
+            count('rental_buildings', 'old.landlord_id', '-'),
+            count('rental_buildings', 'new.landlord_id', '+'),
+            building_payments('old.landlord_id', 'old.id', '-'),
+            building_payments('new.landlord_id', 'new.id', '+'),
+        ])
+    ),
+    'landlord_stats_property_types_ai': ('AFTER INSERT ON landlord_property_type', count('property_types', 'new.landlord_id', '+')),
+    'landlord_stats_property_types_ad': ('AFTER DELETE ON landlord_property_type', count('property_types', 'old.landlord_id', '-')),
+    'landlord_stats_payments_ai': ('AFTER INSERT ON payments', payment('new', '+')),
+    'landlord_stats_payments_ad': ('AFTER DELETE ON payments', payment('old', '-')),
+    'landlord_stats_payments_au': (
+        'AFTER UPDATE OF payment_status, price, monthly_price, rental_building_id ON payments',
+        payment('old', '-') + ' ' + payment('new', '+')
+    ),
+}
+
+BACKFILL = f"""
+INSERT INTO landlord_stats (landlord_id, tenants, rental_buildings, property_types, payments, unpaid_payments, outstanding)
+SELECT landlords.id,
+    (SELECT count(*) FROM tenants WHERE landlord_id = landlords.id),
+    (SELECT count(*) FROM rental_buildings WHERE landlord_id = landlords.id),
+    (SELECT count(*) FROM landlord_property_type WHERE landlord_id = landlords.id),
+    (SELECT count(*) FROM payments JOIN rental_buildings ON rental_buildings.id = payments.rental_building_id
+        WHERE rental_buildings.landlord_id = landlords.id),
+    (SELECT count(*) FROM payments JOIN rental_buildings ON rental_buildings.id = payments.rental_building_id
+        WHERE rental_buildings.landlord_id = landlords.id AND NOT payment_status),
+    (SELECT coalesce(sum({OWED.format(row='payments.')}), 0) FROM payments
+        JOIN rental_buildings ON rental_buildings.id = payments.rental_building_id
+        WHERE rental_buildings.landlord_id = landlords.id)
+FROM landlords
+"""
+
+
+def upgrade():
+    op.create_table('landlord_stats',
+    sa.Column('landlord_id', sa.Integer(), nullable=False),
+    sa.Column('tenants', sa.Integer(), nullable=False),
+    sa.Column('rental_buildings', sa.Integer(), nullable=False),
+    sa.Column('property_types', sa.Integer(), nullable=False),
+    sa.Column('payments', sa.Integer(), nullable=False),
+    sa.Column('unpaid_payments', sa.Integer(), nullable=False),
+    sa.Column('outstanding', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['landlord_id'], ['landlords.id'], ),
+    sa.PrimaryKeyConstraint('landlord_id')
+    )
+    op.execute(BACKFILL)
+    for name, (when, body) in TRIGGERS.items():
+        op.execute(f'CREATE TRIGGER {name} {when} BEGIN {body} END')
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    op.drop_table('landlord_stats')
@@ -0,0 +1,48 @@
+"""Add foreign key and lookup indexes
+
+Revision ID: 3b1c9e7a2d45
+Revises: f8dc96c4d002
+Create Date: 2026-10-17 09:12:04.518311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1c9e7a2d45'
+down_revision = 'f8dc96c4d002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tenants', schema=None) as batch_op:
+        batch_op.create_index('ix_tenants_landlord_id', ['landlord_id'], unique=False)
+
+    with op.batch_alter_table('rental_buildings', schema=None) as batch_op:
+        batch_op.create_index('ix_rental_buildings_landlord_id_property_type_id', ['landlord_id', 'property_type_id'], unique=False)
+        batch_op.create_index('ix_rental_buildings_tenant_id', ['tenant_id'], unique=False)
+        batch_op.create_index('ix_rental_buildings_property_type_id', ['property_type_id'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_rental_building_id_due_date', ['rental_building_id', 'due_date'], unique=False)
+
+    with op.batch_alter_table('landlord_property_type', schema=None) as batch_op:
+        batch_op.create_index('ix_landlord_property_type_property_type_id', ['property_type_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('landlord_property_type', schema=None) as batch_op:
+        batch_op.drop_index('ix_landlord_property_type_property_type_id')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_rental_building_id_due_date')
+
+    with op.batch_alter_table('rental_buildings', schema=None) as batch_op:
+        batch_op.drop_index('ix_rental_buildings_property_type_id')
+        batch_op.drop_index('ix_rental_buildings_tenant_id')
+        batch_op.drop_index('ix_rental_buildings_landlord_id_property_type_id')
+
+    with op.batch_alter_table('tenants', schema=None) as batch_op:
+        batch_op.drop_index('ix_tenants_landlord_id')
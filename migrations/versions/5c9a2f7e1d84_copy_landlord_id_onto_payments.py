@@ -0,0 +1,70 @@
+"""Copy landlord_id onto payments
+
+Revision ID: 5c9a2f7e1d84
+Revises: 7d4a1c9e2b63
+Create Date: 2026-10-17 21:40:18.215907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9a2f7e1d84'
+down_revision = '7d4a1c9e2b63'
+branch_labels = None
+depends_on = None
+
+
+BUILDING_LANDLORD = '(SELECT landlord_id FROM rental_buildings WHERE id = new.rental_building_id)'
+SET_LANDLORD = f'UPDATE payments SET landlord_id = {BUILDING_LANDLORD} WHERE id = new.id;'
+
+TRIGGERS = {
+    'payments_landlord_ai': (
+        f'AFTER INSERT ON payments WHEN new.landlord_id IS NOT {BUILDING_LANDLORD}', SET_LANDLORD
+    ),
+    'payments_landlord_au': (
+        f'AFTER UPDATE OF rental_building_id, landlord_id ON payments WHEN new.landlord_id IS NOT {BUILDING_LANDLORD}',
+        SET_LANDLORD
+    ),
+    'payments_landlord_buildings_au': (
+        'AFTER UPDATE OF landlord_id ON rental_buildings',
+        'UPDATE payments SET landlord_id = new.landlord_id WHERE rental_building_id = new.id;'
+    ),
+}
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('landlord_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        'UPDATE payments SET landlord_id = '
+        '(SELECT landlord_id FROM rental_buildings WHERE id = payments.rental_building_id)'
+    )
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_landlord_id_due_date', ['landlord_id', 'due_date'], unique=False)
+        batch_op.create_index('ix_payments_landlord_id_rental_building_id', ['landlord_id', 'rental_building_id'], unique=False)
+
+    with op.batch_alter_table('rental_buildings', schema=None) as batch_op:
+        batch_op.create_index('ix_rental_buildings_landlord_id', ['landlord_id'], unique=False)
+
+    for name, (when, body) in TRIGGERS.items():
+        op.execute(f'CREATE TRIGGER {name} {when} BEGIN {body} END')
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    with op.batch_alter_table('rental_buildings', schema=None) as batch_op:
+        batch_op.drop_index('ix_rental_buildings_landlord_id')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_landlord_id_rental_building_id')
+        batch_op.drop_index('ix_payments_landlord_id_due_date')
+
+    # plain ALTER rather than batch: recreating payments would drop the
+    # triggers other tables' bookkeeping hangs on it
+    op.execute('ALTER TABLE payments DROP COLUMN landlord_id')
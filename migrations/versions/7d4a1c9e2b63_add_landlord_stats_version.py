@@ -0,0 +1,65 @@
+"""Add landlord_stats.version
+
+Revision ID: 7d4a1c9e2b63
+Revises: 0b5e3f9a7c21
+Create Date: 2026-10-17 19:12:05.804113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4a1c9e2b63'
+down_revision = '0b5e3f9a7c21'
+branch_labels = None
+depends_on = None
+
+
+def version(landlords):
+    return f'UPDATE landlord_stats SET version = version + 1 WHERE landlord_id IN ({landlords});'
+
+
+def payment_landlords(*buildings):
+    return f"SELECT landlord_id FROM rental_buildings WHERE id IN ({', '.join(buildings)})"
+
+
+TRIGGERS = {
+    'landlord_stats_version_landlords_au': ('AFTER UPDATE ON landlords', version('new.id')),
+    'landlord_stats_version_tenants_ai': ('AFTER INSERT ON tenants', version('new.landlord_id')),
+    'landlord_stats_version_tenants_ad': ('AFTER DELETE ON tenants', version('old.landlord_id')),
+    'landlord_stats_version_tenants_au': ('AFTER UPDATE ON tenants', version('old.landlord_id, new.landlord_id')),
+    'landlord_stats_version_rental_buildings_ai': ('AFTER INSERT ON rental_buildings', version('new.landlord_id')),
+    'landlord_stats_version_rental_buildings_ad': ('AFTER DELETE ON rental_buildings', version('old.landlord_id')),
+    'landlord_stats_version_rental_buildings_au': (
+        'AFTER UPDATE ON rental_buildings', version('old.landlord_id, new.landlord_id')
+    ),
+    'landlord_stats_version_payments_ai': ('AFTER INSERT ON payments', version(payment_landlords('new.rental_building_id'))),
+    'landlord_stats_version_payments_ad': ('AFTER DELETE ON payments', version(payment_landlords('old.rental_building_id'))),
+    'landlord_stats_version_payments_au': (
+        'AFTER UPDATE ON payments', version(payment_landlords('old.rental_building_id', 'new.rental_building_id'))
+    ),
+    'landlord_stats_version_property_types_ai': ('AFTER INSERT ON landlord_property_type', version('new.landlord_id')),
+    'landlord_stats_version_property_types_ad': ('AFTER DELETE ON landlord_property_type', version('old.landlord_id')),
+    'landlord_stats_version_property_type_names_au': (
+        'AFTER UPDATE ON property_types',
+        version('SELECT landlord_id FROM landlord_property_type WHERE property_type_id = new.id')
+    ),
+}
+
+
+def upgrade():
+    with op.batch_alter_table('landlord_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+    for name, (when, body) in TRIGGERS.items():
+        op.execute(f'CREATE TRIGGER {name} {when} BEGIN {body} END')
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    # plain ALTER rather than batch: recreating landlord_stats would trip the
+    # counter triggers that write to it
+    op.execute('ALTER TABLE landlord_stats DROP COLUMN version')
@@ -0,0 +1,46 @@
+"""Store payment period as an integer year-month
+
+Revision ID: 8e4f1a6c0b37
+Revises: 3b1c9e7a2d45
+Create Date: 2026-10-17 10:03:51.207764
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f1a6c0b37'
+down_revision = '3b1c9e7a2d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('period_month', sa.Integer(), nullable=True))
+
+    # 'MM-YYYY' -> YYYYMM
+    op.execute(
+        "UPDATE payments SET period_month = "
+        "CAST(substr(payment_period, 4, 4) AS INTEGER) * 100 + CAST(substr(payment_period, 1, 2) AS INTEGER)"
+    )
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.alter_column('period_month', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('payment_period')
+        batch_op.create_index('ix_payments_period_month', ['period_month'], unique=False)
+        batch_op.create_index('ix_payments_rental_building_id_period_month', ['rental_building_id', 'period_month'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_rental_building_id_period_month')
+        batch_op.drop_index('ix_payments_period_month')
+        batch_op.add_column(sa.Column('payment_period', sa.String(length=7), nullable=True))
+
+    op.execute("UPDATE payments SET payment_period = printf('%02d-%04d', period_month % 100, period_month / 100)")
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.alter_column('payment_period', existing_type=sa.String(length=7), nullable=False)
+        batch_op.drop_column('period_month')
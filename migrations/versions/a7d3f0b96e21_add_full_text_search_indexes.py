@@ -0,0 +1,42 @@
+"""Add full-text search indexes
+
+Revision ID: a7d3f0b96e21
+Revises: c52d7e9f4a18
+Create Date: 2026-10-17 13:02:18.514870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3f0b96e21'
+down_revision = 'c52d7e9f4a18'
+branch_labels = None
+depends_on = None
+
+FTS_TABLES = {
+    'rental_buildings': ('rental_buildings_fts', ('address', 'landlord_id')),
+    'tenants': ('tenants_fts', ('first_name', 'last_name', 'occupation', 'telephone', 'landlord_id')),
+}
+
+
+def upgrade():
+    for table, (fts, columns) in FTS_TABLES.items():
+        names = ', '.join(columns)
+        new = ', '.join(f'new.{c}' for c in columns)
+        old = ', '.join(f'old.{c}' for c in columns)
+        delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+        insert = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});'
+        op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', prefix='2 3 4')")
+        op.execute(f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END')
+        op.execute(f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END')
+        op.execute(f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END')
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    for fts, _ in FTS_TABLES.values():
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {fts}')
@@ -0,0 +1,26 @@
+"""Index property type name
+
+Revision ID: c52d7e9f4a18
+Revises: 8e4f1a6c0b37
+Create Date: 2026-10-17 11:26:40.332019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d7e9f4a18'
+down_revision = '8e4f1a6c0b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property_types', schema=None) as batch_op:
+        batch_op.create_index('ix_property_types_property_type_name', ['property_type_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('property_types', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_types_property_type_name')
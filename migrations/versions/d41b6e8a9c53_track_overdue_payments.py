@@ -0,0 +1,84 @@
+"""Track overdue payments
+
+Revision ID: d41b6e8a9c53
+Revises: a7d3f0b96e21
+Create Date: 2026-10-17 14:21:05.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b6e8a9c53'
+down_revision = 'a7d3f0b96e21'
+branch_labels = None
+depends_on = None
+
+ROW = (
+    'INSERT INTO overdue_payments (payment_id, landlord_id, rental_building_id, due_date, amount_due) '
+    'SELECT new.id, rental_buildings.landlord_id, new.rental_building_id, new.due_date, new.monthly_price '
+    'FROM rental_buildings WHERE rental_buildings.id = new.rental_building_id '
+    'AND rental_buildings.landlord_id IS NOT NULL AND NOT new.payment_status '
+    "AND new.due_date < (SELECT value FROM watermarks WHERE name = 'overdue_payments');"
+)
+BUILDING_ROWS = (
+    'INSERT INTO overdue_payments (payment_id, landlord_id, rental_building_id, due_date, amount_due) '
+    'SELECT id, new.landlord_id, new.id, due_date, monthly_price FROM payments '
+    'WHERE rental_building_id = new.id AND new.landlord_id IS NOT NULL AND NOT payment_status '
+    "AND due_date < (SELECT value FROM watermarks WHERE name = 'overdue_payments');"
+)
+
+
+def upgrade():
+    op.create_table('watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('overdue_payments',
+    sa.Column('payment_id', sa.Integer(), nullable=False),
+    sa.Column('landlord_id', sa.Integer(), nullable=False),
+    sa.Column('rental_building_id', sa.Integer(), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('amount_due', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['landlord_id'], ['landlords.id'], ),
+    sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+    sa.ForeignKeyConstraint(['rental_building_id'], ['rental_buildings.id'], ),
+    sa.PrimaryKeyConstraint('payment_id')
+    )
+    with op.batch_alter_table('overdue_payments', schema=None) as batch_op:
+        batch_op.create_index('ix_overdue_payments_landlord_id_due_date', ['landlord_id', 'due_date', 'payment_id'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_due_date', ['due_date'], unique=False)
+
+    op.execute(f'CREATE TRIGGER overdue_payments_ai AFTER INSERT ON payments BEGIN {ROW} END')
+    op.execute(
+        'CREATE TRIGGER overdue_payments_au AFTER UPDATE OF payment_status, due_date, monthly_price, rental_building_id '
+        f'ON payments BEGIN DELETE FROM overdue_payments WHERE payment_id = old.id; {ROW} END'
+    )
+    op.execute(
+        'CREATE TRIGGER overdue_payments_ad AFTER DELETE ON payments '
+        'BEGIN DELETE FROM overdue_payments WHERE payment_id = old.id; END'
+    )
+    op.execute(
+        'CREATE TRIGGER overdue_payments_buildings_au AFTER UPDATE OF landlord_id ON rental_buildings '
+        'WHEN new.landlord_id IS NOT old.landlord_id BEGIN '
+        'DELETE FROM overdue_payments WHERE payment_id IN (SELECT id FROM payments WHERE rental_building_id = new.id); '
+        f'{BUILDING_ROWS} END'
+    )
+
+
+def downgrade():
+    for name in ('overdue_payments_ai', 'overdue_payments_au', 'overdue_payments_ad', 'overdue_payments_buildings_au'):
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_due_date')
+
+    with op.batch_alter_table('overdue_payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_overdue_payments_landlord_id_due_date')
+
+    op.drop_table('overdue_payments')
+    op.drop_table('watermarks')
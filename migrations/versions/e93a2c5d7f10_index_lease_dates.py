@@ -0,0 +1,28 @@
+"""Index lease dates per landlord
+
+Revision ID: e93a2c5d7f10
+Revises: d41b6e8a9c53
+Create Date: 2026-10-17 15:03:44.671392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a2c5d7f10'
+down_revision = 'd41b6e8a9c53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rental_buildings', schema=None) as batch_op:
+        batch_op.create_index('ix_rental_buildings_landlord_id_starting_date', ['landlord_id', 'starting_date'], unique=False)
+        batch_op.create_index('ix_rental_buildings_landlord_id_ending_date', ['landlord_id', 'ending_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rental_buildings', schema=None) as batch_op:
+        batch_op.drop_index('ix_rental_buildings_landlord_id_ending_date')
+        batch_op.drop_index('ix_rental_buildings_landlord_id_starting_date')
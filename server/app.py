@@ -1,199 +1,155 @@
-from flask import Flask, request, make_response, jsonify, session, redirect, url_for, send_from_directory
-from flask_restful import Api, Resource
-from flask_cors import CORS
-from server.config import Config
-# from server.config import Config
-from server.extensions import db, ma  # Import extensions from extensions.py
-# from server.extensions import db, ma  # Import extensions from extensions.py
-from datetime import datetime, timedelta, date
-from dotenv import load_dotenv
-from flask_migrate import Migrate
-from marshmallow import ValidationError
-from collections import defaultdict
-from server.models import Landlord, Tenant, RentalBuilding, PropertyType, Payment, LandlordSchema, PropertyTypeSchema, RentalBuildingSchema
-import re
-# from server.models import Landlord, Tenant, RentalBuilding, PropertyType  # or whatever your models are
-
-# from flask import send_from_directory andlordSchema
-
-
-load_dotenv()
+from collections.abc import Mapping
+from importlib import import_module
 import os
 
-# Initialize Flask app
-app = Flask(__name__)
-# app = Flask(__name__, static_folder='../client/build', static_url_path='/')
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
-
-
-# Set app configurations
-app.config.from_object(Config)
-app.config['FLASK_DEBUG'] = 1
-
-# Initialize extensions
-db.init_app(app)
-ma.init_app(app)
-migrate = Migrate(app, db)
-
-
-# from server.models import User, Plant, Category, CareNote, UserSchema, CategorySchema, PlantSchema, CareNoteSchema
-
-# Initialize API
-api = Api(app)
-CORS(app, supports_credentials=True)
-
-
-
-
-@app.route('/')
-def index():
-    return '<h1>Project Server</h1>'
-
-class CheckSession(Resource):
-    def get(self):
-        landlord_id = session.get('landlord_id')
-        if not landlord_id:
-            return {'error': 'unauthorized'}, 401
-        landlord = Landlord.query.filter(Landlord.id == landlord_id).first()
-        if not landlord:
-            return {'error': 'landlord not found'}, 404
-        landlord_schema = LandlordSchema()
-        landlord_data = landlord_schema.dump(landlord)
-        return landlord_data, 200
-        
-        
-class Login(Resource):
-    def post(self):
-        
-        data = request.get_json()
-        username = data.get('username')
-        password = data.get('password')
-
-        if not all([username, password]):
-            return {'error': 'all the fiels are required'}, 400
-        
-        landlord = Landlord.query.filter(Landlord.username == username).first()
-        if not landlord or not landlord.check_password(password):
-            return {'error': "username or password doesn't match"}, 400
-        
-        session['landlord_id'] = landlord.id
-        session.permanent = True
-
-        landlord_schema = LandlordSchema()
-        landlord_data = landlord_schema.dump(landlord)
-        return landlord_data, 200
-
-class Signup(Resource):
-    def post(self):
-
-        data = request.get_json()
-        username = data.get('username')
-        password = data.get('password')
-        confirmed_password = data.get('confirmed_password')
-
-        existing_landlord = Landlord.query.filter(Landlord.username == username).first()
-
-        pattern = re.compile(r'^(?=.*[A-Z])(?=.*[!@#$%^&*]).{6,}$')
-
-        if not username or not isinstance(username, str):
-            return {'error': 'username is required and must be a string'}, 400
-        if len(username) < 3 or len(username) > 50:
-            return {'error': 'username must be between 3 and 50 characters'}, 400
-        if existing_landlord:
-            return {'error': 'username already exists'}, 400
-        
-        if not password or not isinstance(password, str):
-            return {'error': 'password is required and must be a string'}, 400
-        if len(password) < 6 or len(password) > 100:
-            return {'error': 'password must be between 6 and 100 characters'}, 400
-        if not pattern.match(password):
-            return {'error': 'password must be at least 6 characters and include at least an upper case and a symbol(!@#$%^&*)'}
-        
-        if not confirmed_password or not isinstance(confirmed_password, str):
-            return {'error': 'confirmed_password is required and must be a string'}, 400
-        if password != confirmed_password:
-            return {'error': "password doesn't match"}, 400
-        
-        # new_landlord = Landlord()
-        # new_landlord.username = username
-        # new_landlord.password = password
-        new_landlord = Landlord(username=username, password=password)
-        
-
-        db.session.add(new_landlord)
-        db.session.commit()
-
-        session['landlord_id'] = new_landlord.id
-        session.permanent = True
-
-        landlord_schema = LandlordSchema()
-        
-
-        return landlord_schema.dump(new_landlord), 201
-
-
-class NewRentalBuilding(Resource):
-    def post(self):
-
-        landlord_id = session.get('landlord_id')
-        if not landlord_id:
-            return {'error': 'unauthorized'}, 401
-        landlord = Landlord.query.filter(Landlord.id == landlord_id).first()
-        if not landlord:
-            return {'error': 'landlord not found'}, 404
-        data = request.get_json()
-        address = data.get('address')
-        starting_date = data.get('starting_date')
-        ending_date = data.get('ending_date')
-        # landlord_id = data.get('landlord_id')
-        tenant_id = data.get('tenant_id')
-        property_type_id = data.get('property_type_id')
-
-        if not address or not isinstance(address, str):
-            return {'error': 'address is required and must be a string'}, 400
-        if len(address) < 3 or len(address) > 200:
-            return {'error':'address must be between 3 and 200 characters'}, 400
-        
-        try:
-            starting_date = datetime.strptime(starting_date, '%Y-%m-%d').date()
-        except (ValueError, TypeError):
-            return {'error': 'starting_date must be a valid date in YYYY-MM-DD format.'}, 400
-        try:
-            ending_date = datetime.strptime(ending_date, '%Y-%m-%d').date()
-        except (ValueError, TypeError):
-            return {'error': 'ending_date must be a valid date in YYYY-MM-DD format.'}, 400
-        
-        existing_building = RentalBuilding.query.filter(RentalBuilding.address == address).first()
-        if existing_building:
-            return {'error': 'A rental building with this address already exists'}, 400
-
-
-        new_rental_building = RentalBuilding(
-            address = address,
-            starting_date = starting_date,
-            ending_date = ending_date,
-            landlord_id = landlord_id,
-            tenant_id = tenant_id,
-            property_type_id = property_type_id
-        )
-
-        db.session.add(new_rental_building)
-        db.session.commit()
-
-        return RentalBuildingSchema().dump(new_rental_building), 201
-
-        
-                
-api.add_resource(CheckSession, '/check_session')    
-api.add_resource(Login, '/login')    
-api.add_resource(Signup, '/signup')
-api.add_resource(NewRentalBuilding, '/rental_buildings/new')    
+import click
+from dotenv import load_dotenv
+from flask import Flask
+from flask_cors import CORS
+from flask_restful import Api
+
+from server.config import config_for
+from server.extensions import db  # Import extensions from extensions.py
+# These hook the session, the engine, the responses or the schema (triggers,
+# change log, landlord_stats), so they load with the app rather than with a
+# resource. search, overdue, billing, changefeed and stats also add commands.
+from server import sessions, engine, idempotency, instrumentation, search, overdue, billing, changefeed, stats, encoding
+
+# Modules that only add flask commands. They are imported when the app is
+# built inside the CLI, so a worker never loads them (benchmarks alone pulls
+# in versioning, search, occupancy and pagination).
+CLI_MODULES = ('explain', 'bulk_import', 'benchmarks', 'generate')
+
+
+# (url, resource in server.resources, methods). Resources are imported on the
+# first request that needs one, so building the app, the CLI and migrations
+# never pay for the schemas and serializers behind them.
+RESOURCES = (
+    ('/check_session', 'CheckSession', ('GET',)),
+    ('/login', 'Login', ('POST',)),
+    ('/signup', 'Signup', ('POST',)),
+    ('/rental_buildings/new', 'NewRentalBuilding', ('POST',)),
+    ('/rental_buildings', 'RentalBuildingList', ('GET',)),
+    ('/rental_buildings/occupancy/<string:kind>', 'RentalBuildingOccupancy', ('GET',)),
+    ('/rental_buildings/by_property_type/<string:type_name>', 'RentalBuildingsByPropertyType', ('GET',)),
+    ('/property_types/counts', 'PropertyTypeCounts', ('GET',)),
+    ('/tenants', 'TenantList', ('GET',)),
+    ('/payments', 'PaymentList', ('GET',)),
+    ('/payments/generate', 'GeneratePayments', ('POST',)),
+    ('/payments/overdue', 'OverduePaymentList', ('GET',)),
+    ('/changes', 'Changes', ('GET',)),
+    ('/stats', 'Stats', ('GET',)),
+    ('/reports/<string:name>', 'Report', ('GET',)),
+    ('/search', 'Search', ('GET',)),
+    ('/import/<string:kind>', 'BulkImport', ('POST',)),
+    ('/batch', 'Batch', ('POST',)),
+    ('/metrics/hashing', 'HashingMetrics', ('GET',)),
+    ('/metrics/requests', 'RequestMetrics', ('GET',)),
+    ('/export', 'PortfolioExport', ('GET',)),
+)
+
+
+class LazyResource:
+    # Stands in for api.add_resource's view function until the first call,
+    # then builds the same thing: the Resource view wrapped in api.output.
+
+    def __init__(self, api, name, endpoint, methods):
+        self.api = api
+        self.name = name
+        self.endpoint = endpoint
+        self.methods = set(methods)
+        self.view = None
+        self.__name__ = endpoint
+
+    def load(self):
+        resource = getattr(import_module('server.resources'), self.name)
+        if not self.methods >= resource.methods:
+            raise RuntimeError(f'RESOURCES lists {sorted(self.methods)} for {self.name}, it serves {sorted(resource.methods)}')
+        resource.mediatypes = self.api.mediatypes_method()
+        resource.endpoint = self.endpoint
+        view = self.api.output(resource.as_view(self.endpoint))
+        for decorator in self.api.decorators:
+            view = decorator(view)
+        return view
+
+    def __call__(self, *args, **kwargs):
+        if self.view is None:
+            self.view = self.load()
+        return self.view(*args, **kwargs)
+
+
+def add_resources(app, api):
+    for url, name, methods in RESOURCES:
+        endpoint = name.lower()
+        # so flask_restful formats this endpoint's errors, as add_resource would
+        api.endpoints.add(endpoint)
+        app.add_url_rule(url, endpoint, LazyResource(api, name, endpoint, methods), methods=methods)
+
+
+def create_app(config=None):
+    """
+    Build the app. config is a config class (default config_for(), picked by
+    APP_ENV) or a mapping of overrides applied on top of the default.
+    Flask-Migrate is only set up under the flask command; scripts that call
+    flask_migrate directly do Migrate(app, db) themselves.
+    """
+    load_dotenv()
+
+    # Initialize Flask app
+    app = Flask(__name__)
+    # app = Flask(__name__, static_folder='../client/build', static_url_path='/')
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
+
+    # Set app configurations
+    if config is None or isinstance(config, Mapping):
+        app.config.from_object(config_for())
+        app.config.from_mapping(config or {})
+    else:
+        app.config.from_object(config)
+    app.config['FLASK_DEBUG'] = 1
+
+    # Initialize extensions
+    engine.configure(app)
+    db.init_app(app)
+    engine.init_app(app)
+    sessions.init_app(app)
+    idempotency.init_app(app)
+    instrumentation.init_app(app)
+    overdue.init_app(app)
+    changefeed.init_app(app)
+    if click.get_current_context(silent=True) is not None:
+        # Only the flask db commands need Flask-Migrate, and importing it pulls
+        # in alembic; a worker process never builds its app inside the CLI.
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Initialize API
+    api = Api(app)
+    CORS(app, supports_credentials=True)
+    encoding.init_app(app, api)
+
+    @app.route('/')
+    def index():
+        return '<h1>Project Server</h1>'
+
+    add_resources(app, api)
+
+    search.register(app)
+    overdue.register(app)
+    billing.register(app)
+    changefeed.register(app)
+    stats.register(app)
+    if click.get_current_context(silent=True) is not None:
+        for name in CLI_MODULES:
+            import_module(f'server.{name}').register(app)
+
+    return app
 
 
 if __name__ == '__main__':
     print("🔥 Running from the correct app file 🔥")
-    app.run(port=5555, debug=True)
+    create_app().run(port=5555, debug=True)
+
 
-       
-   #python -m server.app    
-   # http://localhost:5555/check_session
\ No newline at end of file
+   #python -m server.app
+   # http://localhost:5555/check_session
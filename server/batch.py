@@ -0,0 +1,107 @@
+from flask import current_app, session
+from flask.ctx import RequestContext
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from server import versioning
+from server.app import RESOURCES
+from server.extensions import db, BATCH_CONNECTION
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Streaming bodies and their own chunked commits don't fit in one transaction.
+NOT_BATCHABLE = ('batch', 'bulkimport', 'portfolioexport')
+BATCHABLE = {name.lower() for _, name, _ in RESOURCES} - set(NOT_BATCHABLE)
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_operations(data, limit):
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations is required and must be a non-empty list')
+    if len(operations) > limit:
+        raise BatchError(f'at most {limit} operations per batch')
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise BatchError(f'operation {index} must be an object')
+        method = operation.get('method')
+        path = operation.get('path')
+        body = operation.get('body')
+        if method not in METHODS:
+            raise BatchError(f"operation {index}: method must be one of {', '.join(METHODS)}")
+        if not isinstance(path, str) or not path.startswith('/'):
+            raise BatchError(f'operation {index}: path is required and must start with /')
+        if body is not None and not isinstance(body, dict):
+            raise BatchError(f'operation {index}: body must be an object')
+        parsed.append((method, path, body))
+    return parsed
+
+
+def _dispatch(app, method, path, body, shared_session):
+    # The operation goes through the same view a standalone request would,
+    # minus the before/after_request hooks: the batch request already ran them.
+    builder = EnvironBuilder(path=path, method=method, json=body)
+    try:
+        ctx = RequestContext(app, builder.get_environ(), session=shared_session)
+    finally:
+        builder.close()
+    with ctx:
+        endpoint = ctx.request.url_rule.endpoint if ctx.request.url_rule else None
+        if ctx.request.routing_exception is None and endpoint not in BATCHABLE:
+            return 400, {'error': f'{method} {ctx.request.path} cannot be batched'}
+        try:
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            return e.code, {'error': e.description}
+        return response.status_code, response.get_json(silent=True)
+
+
+def run(operations):
+    """
+    Run (method, path, body) operations in order on one connection and
+    transaction: the resources' own commits only end their session
+    transaction, and the batch commits once at the end. The first operation
+    answering 4xx/5xx stops the batch and everything, including session
+    changes such as a signup's login and /check_session payloads cached along
+    the way, is rolled back.
+    """
+    app = current_app._get_current_object()
+    shared_session = session._get_current_object()
+    before = dict(shared_session), shared_session.permanent
+
+    results = []
+    failed = None
+    committed = False
+    db.session.close()
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        db.session.info[BATCH_CONNECTION] = connection
+        # /check_session payloads read mid-batch see uncommitted versions
+        pending = db.session.info[versioning.PENDING] = {}
+        try:
+            for index, (method, path, body) in enumerate(operations):
+                status, payload = _dispatch(app, method, path, body, shared_session)
+                results.append({'status': status, 'body': payload})
+                if status >= 400:
+                    failed = index
+                    break
+            if failed is None:
+                db.session.commit()
+                transaction.commit()
+                committed = True
+                versioning.publish(pending)
+        finally:
+            db.session.close()
+            db.session.info.pop(BATCH_CONNECTION, None)
+            db.session.info.pop(versioning.PENDING, None)
+            if transaction.is_active:
+                transaction.rollback()
+            if not committed:
+                shared_session.clear()
+                shared_session.update(before[0])
+                shared_session.permanent = before[1]
+
+    return {'committed': committed, 'failed': failed, 'results': results}
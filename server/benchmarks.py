@@ -0,0 +1,581 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import date, timedelta
+
+import click
+from flask import Flask
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.exc import OperationalError
+
+from server import versioning, search, occupancy, engine as sqlite_engine
+from server.generate import PASSWORD
+from server.config import Config, ProductionConfig
+from server.extensions import db
+from server.pagination import paginate
+from server.models import Landlord, Tenant, RentalBuilding, PropertyType, Payment
+
+
+def scratch_app(uri='sqlite://', config=Config):
+    # A second app bound to its own database, so benchmarks never touch app.db.
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    sqlite_engine.configure(app)
+    db.init_app(app)
+    sqlite_engine.init_app(app)
+    return app
+
+
+def build_portfolio(payments, buildings):
+    db.session.execute(insert(Landlord), [{'id': 1, 'username': 'bench', 'password_hash': 'x'}])
+    db.session.execute(insert(PropertyType), [{'id': 1, 'property_type_name': 'Apartment'}])
+    db.session.execute(insert(Tenant), [
+        {'id': i, 'first_name': 'Tenant', 'last_name': f'No{i}', 'telephone': '555-555-5555', 'occupation': 'Engineer', 'landlord_id': 1}
+        for i in range(1, buildings + 1)
+    ])
+    db.session.execute(insert(RentalBuilding), [
+        {'id': i, 'address': f'{i} Bench St', 'starting_date': date(2020, 1, 1), 'ending_date': date(2030, 1, 1),
+         'landlord_id': 1, 'tenant_id': i, 'property_type_id': 1}
+        for i in range(1, buildings + 1)
+    ])
+    rows = []
+    for i in range(payments):
+        due = date(2020, 1, 1) + timedelta(days=30 * (i // buildings))
+        rows.append({
+            'monthly_price': 1500, 'price': 1500, 'payment_status': i % 3 != 0,
+            'payment_date': due + timedelta(days=i % 7), 'due_date': due,
+            'period_month': due.year * 100 + due.month, 'rental_building_id': i % buildings + 1,
+        })
+    db.session.execute(insert(Payment), rows)
+    db.session.commit()
+
+
+def best_of(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def serialization(payments=50000, buildings=500, repeat=3):
+    # the schemas are deferred until something serializes, see server.schemas
+    from server import serializers
+    from server.loaders import load_landlord
+    from server.schemas import LandlordSchema
+
+    app = scratch_app()
+    with app.app_context():
+        db.create_all()
+        build_portfolio(payments, buildings)
+        marshmallow_time, expected = best_of(lambda: LandlordSchema().dump(load_landlord(1)), repeat)
+        compiled_time, actual = best_of(lambda: serializers.dump_landlord(1), repeat)
+        db.drop_all()
+
+    return {
+        'payments': payments,
+        'marshmallow_s': round(marshmallow_time, 4),
+        'compiled_s': round(compiled_time, 4),
+        'speedup': round(marshmallow_time / compiled_time, 1),
+        'identical': json.dumps(expected) == json.dumps(actual),
+    }
+
+
+def encodings(payments=50000, buildings=500, repeat=3):
+    """
+    Bytes on the wire and client decode time of one /check_session payload
+    for each representation and content coding on offer, see server.encoding.
+    """
+    from server import encoding, serializers
+
+    app = scratch_app()
+    with app.app_context():
+        db.create_all()
+        build_portfolio(payments, buildings)
+        data = serializers.dump_landlord(1)
+        db.drop_all()
+
+    bodies = {'json': (json.dumps(data).encode(), json.loads)}
+    bodies['columns+json'] = (json.dumps(encoding.columns(data)).encode(), json.loads)
+    if encoding.HAS_MSGPACK:
+        import msgpack
+        bodies['msgpack'] = (msgpack.packb(data, use_bin_type=True), msgpack.unpackb)
+        bodies['columns+msgpack'] = (msgpack.packb(encoding.columns(data), use_bin_type=True), msgpack.unpackb)
+    codings = {'identity': None, 'gzip': lambda body: zlib.decompress(body, 16 + zlib.MAX_WBITS)}
+    if encoding.HAS_ZSTD:
+        import zstandard
+        codings['zstd'] = lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+    results = {}
+    for name, (body, parse) in bodies.items():
+        for coding, decompress in codings.items():
+            sent = body
+            if decompress is not None:
+                stream = encoding.compressor(coding)
+                sent = stream.compress(body) + stream.flush()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                parse(decompress(sent) if decompress else sent)
+                timings.append(time.perf_counter() - started)
+            results[f'{name}/{coding}'] = {'bytes': len(sent), 'decode_ms': round(min(timings) * 1000, 2)}
+    return {'payments': payments, **results}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def run_scenario(engine, name, fn, requests):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    latencies = []
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for i in range(requests):
+            started = time.perf_counter()
+            status = fn(i)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                raise click.ClickException(f'{name} returned {status}')
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    # tracemalloc slows allocation-heavy code several times over, so peak
+    # memory comes from one extra request outside the timed loop.
+    tracemalloc.start()
+    try:
+        fn(requests)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'statements_per_request': round(len(statements) / requests, 1),
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def endpoints(app, requests=50):
+    """
+    Drive the real resources through the test client against the configured
+    database, which should hold a portfolio from flask generate.
+    """
+    with app.app_context():
+        engine = db.engine
+        landlord = db.session.execute(
+            select(Landlord.id, Landlord.username).order_by(Landlord.id).limit(1)
+        ).one_or_none()
+        property_type_id = db.session.scalar(select(PropertyType.id).limit(1))
+    if landlord is None:
+        raise click.ClickException('no landlords found, run flask generate first')
+
+    landlord_id, username = landlord
+    run = int(time.time())
+    client = app.test_client()
+
+    def login(i):
+        return client.post('/login?view=summary', json={'username': username, 'password': PASSWORD}).status_code
+
+    def check_session(i):
+        versioning.clear()
+        return client.get('/check_session').status_code
+
+    def check_session_cached(i):
+        return client.get('/check_session').status_code
+
+    def check_session_summary(i):
+        versioning.clear()
+        return client.get('/check_session?view=summary').status_code
+
+    def signup(i):
+        name = f'bench{run}x{i}'
+        return app.test_client().post('/signup', json={
+            'username': name, 'password': PASSWORD, 'confirmed_password': PASSWORD
+        }).status_code
+
+    def new_rental_building(i):
+        return client.post('/rental_buildings/new', json={
+            'address': f'{run}-{i} Benchmark Ave', 'starting_date': '2024-01-01', 'ending_date': '2025-01-01',
+            'property_type_id': property_type_id
+        }).status_code
+
+    login(0)
+    scenarios = [
+        ('login', login),
+        ('check_session', check_session),
+        ('check_session_cached', check_session_cached),
+        ('check_session_summary', check_session_summary),
+        ('signup', signup),
+        ('rental_buildings_new', new_rental_building),
+    ]
+    return {name: run_scenario(engine, name, fn, requests) for name, fn in scenarios}
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            found.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result['statements_per_request'] > before['statements_per_request']:
+            found.append(f"{name}: statements {before['statements_per_request']} -> {result['statements_per_request']}")
+        if result['peak_kb'] > before['peak_kb'] * (1 + tolerance):
+            found.append(f"{name}: peak memory {before['peak_kb']}KB -> {result['peak_kb']}KB")
+    return found
+
+
+def mixed_load(app, readers, writers, seconds, buildings):
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'reads': 0, 'writes': 0, 'locked': 0, 'read_latencies': []}
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            with app.test_request_context(method='GET'):
+                started = time.perf_counter()
+                db.session.execute(
+                    select(Payment).where(Payment.rental_building_id == rng.randint(1, buildings))
+                ).all()
+                elapsed = time.perf_counter() - started
+                db.session.remove()
+            with lock:
+                stats['reads'] += 1
+                stats['read_latencies'].append(elapsed)
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    db.session.add(Payment(
+                        monthly_price=1500, price=1500, payment_status=True, payment_date=date(2024, 1, 1),
+                        due_date=date(2024, 1, 1), payment_period='01-2024', rental_building_id=rng.randint(1, buildings)
+                    ))
+                    db.session.commit()
+                    key = 'writes'
+                except OperationalError:
+                    db.session.rollback()
+                    key = 'locked'
+                db.session.remove()
+            with lock:
+                stats[key] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'reads_per_s': round(stats['reads'] / seconds),
+        'writes_per_s': round(stats['writes'] / seconds),
+        'locked_errors': stats['locked'],
+        'read_p95_ms': round(percentile(stats['read_latencies'], 0.95) * 1000, 2) if stats['read_latencies'] else None,
+    }
+
+
+def sqlite_profiles(readers=4, writers=2, seconds=5, payments=50000, buildings=500):
+    """Same mixed read/write load against the default and production engine profiles."""
+    results = {}
+    for name, config in (('default', Config), ('production', ProductionConfig)):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'bench.db')
+        app = scratch_app(f'sqlite:///{path}', config)
+        with app.app_context():
+            db.create_all()
+            build_portfolio(payments, buildings)
+        results[name] = mixed_load(app, readers, writers, seconds, buildings)
+        with app.app_context():
+            for bound in db.engines.values():
+                bound.dispose()
+        for filename in os.listdir(directory):
+            os.remove(os.path.join(directory, filename))
+        os.rmdir(directory)
+    return results
+
+
+def search_latency(rows=1000000, landlords=1000, queries=500, seed=0):
+    """
+    Autocomplete latency over rows rental buildings and tenants (half each)
+    spread across landlords, using the same FTS5 tables and triggers the
+    migration creates.
+    """
+    rng = random.Random(seed)
+    words = ('Main', 'Maple', 'Market', 'Marion', 'Oak', 'Olive', 'Orchard', 'Pine', 'Park', 'Parker', 'River', 'Ridge')
+    jobs = ('Engineer', 'Teacher', 'Designer', 'Nurse', 'Accountant', 'Chef', 'Driver', 'Lawyer')
+    half = rows // 2
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'search.db')
+    app = scratch_app(f'sqlite:///{path}', ProductionConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            db.session.execute(insert(Landlord), [
+                {'id': i, 'username': f'bench{i}', 'password_hash': 'x'} for i in range(1, landlords + 1)
+            ])
+            for start in range(0, half, 50000):
+                ids = range(start + 1, min(start + 50000, half) + 1)
+                db.session.execute(insert(Tenant), [
+                    {'id': i, 'first_name': rng.choice(words) + 'son', 'last_name': rng.choice(words),
+                     'telephone': f'555-{i % 1000:03d}-{i % 10000:04d}', 'occupation': rng.choice(jobs),
+                     'landlord_id': i % landlords + 1}
+                    for i in ids
+                ])
+                db.session.execute(insert(RentalBuilding), [
+                    {'id': i, 'address': f'{i} {rng.choice(words)} {rng.choice(words)} St', 'starting_date': date(2020, 1, 1),
+                     'ending_date': date(2030, 1, 1), 'landlord_id': i % landlords + 1, 'tenant_id': i}
+                    for i in ids
+                ])
+            db.session.commit()
+            load_s = time.perf_counter() - started
+
+            latencies = []
+            for _ in range(queries):
+                q = rng.choice(words)[:rng.randint(2, 4)]
+                started = time.perf_counter()
+                search.search(rng.randint(1, landlords), q)
+                latencies.append(time.perf_counter() - started)
+            db.session.remove()
+            for bound in db.engines.values():
+                bound.dispose()
+    finally:
+        for filename in os.listdir(directory):
+            os.remove(os.path.join(directory, filename))
+        os.rmdir(directory)
+
+    return {
+        'rows': half * 2,
+        'landlords': landlords,
+        'load_s': round(load_s, 1),
+        'queries': queries,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def occupancy_latency(leases=200000, landlords=100, queries=200, limit=50, seed=0):
+    """
+    First-page latency of each occupancy query over leases rental buildings,
+    next to loading the landlord's buildings and filtering in Python.
+    """
+    rng = random.Random(seed)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'occupancy.db')
+    app = scratch_app(f'sqlite:///{path}', ProductionConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.execute(insert(Landlord), [
+                {'id': i, 'username': f'bench{i}', 'password_hash': 'x'} for i in range(1, landlords + 1)
+            ])
+            db.session.execute(insert(PropertyType), [{'id': i, 'property_type_name': f'Type{i}'} for i in range(1, 6)])
+            for start in range(0, leases, 50000):
+                rows = []
+                for i in range(start + 1, min(start + 50000, leases) + 1):
+                    starting = date(2018, 1, 1) + timedelta(days=rng.randrange(0, 365 * 8))
+                    rows.append({
+                        'id': i, 'address': f'{i} Lease Ln', 'starting_date': starting,
+                        'ending_date': starting + timedelta(days=rng.choice((180, 365, 730))),
+                        'landlord_id': rng.randint(1, landlords), 'property_type_id': rng.randint(1, 5),
+                    })
+                db.session.execute(insert(RentalBuilding), rows)
+            db.session.commit()
+
+            windows = []
+            for _ in range(queries):
+                window_from = date(2018, 1, 1) + timedelta(days=rng.randrange(0, 365 * 9))
+                windows.append((rng.randint(1, landlords), window_from, window_from + timedelta(days=rng.choice((7, 30, 90)))))
+
+            results = {}
+            for kind in occupancy.QUERIES:
+                latencies = []
+                for landlord_id, window_from, window_to in windows:
+                    started = time.perf_counter()
+                    query, columns, types = occupancy.occupancy_query(kind, landlord_id, window_from, window_to)
+                    paginate(query, columns, types, None, limit)
+                    latencies.append(time.perf_counter() - started)
+                    db.session.expunge_all()
+                query, columns, _ = occupancy.occupancy_query(kind, 1, date(2022, 1, 1), date(2022, 2, 1))
+                plan = db.session.execute(
+                    text('EXPLAIN QUERY PLAN ' + str(query.order_by(*columns).limit(limit).compile(
+                        db.engine, compile_kwargs={'literal_binds': True})))
+                ).all()
+                results[kind] = {
+                    'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+                    'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                    'plan': [row[-1] for row in plan],
+                }
+
+            latencies = []
+            for landlord_id, window_from, window_to in windows:
+                started = time.perf_counter()
+                buildings = db.session.scalars(select(RentalBuilding).where(RentalBuilding.landlord_id == landlord_id)).all()
+                [b for b in buildings if b.ending_date < window_from or b.starting_date > window_to][:limit]
+                latencies.append(time.perf_counter() - started)
+                db.session.expunge_all()
+            results['load_and_filter'] = {
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            }
+            db.session.remove()
+            for bound in db.engines.values():
+                bound.dispose()
+    finally:
+        for filename in os.listdir(directory):
+            os.remove(os.path.join(directory, filename))
+        os.rmdir(directory)
+
+    return {'leases': leases, 'landlords': landlords, 'queries': queries, 'limit': limit, **results}
+
+
+# Built lazily by server.app and friends; importing any of them at startup is
+# a cold-start regression even when the total stays under budget.
+DEFERRED_IMPORTS = ('faker', 'alembic', 'flask_marshmallow', 'marshmallow_sqlalchemy', 'server.schemas', 'server.resources')
+COLD_START = 'from server.app import create_app; create_app()'
+
+
+def import_time(runs=5, statement=COLD_START):
+    """
+    Best of runs fresh interpreters under -X importtime: wall time for
+    statement, its import time grouped by top-level package, and any
+    DEFERRED_IMPORTS it loaded.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = f'import time; started = time.perf_counter(); {statement}; print(time.perf_counter() - started)'
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script], cwd=root, capture_output=True, text=True, check=True
+        )
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result.stderr)
+
+    elapsed, report = best
+    packages = {}
+    loaded = set()
+    for line in report.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        loaded.add(name)
+        package = name.split('.')[0] if not name.startswith('server.') else name
+        packages[package] = packages.get(package, 0) + int(own)
+
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:15]
+    return {
+        'statement': statement,
+        'elapsed_ms': round(elapsed * 1000, 1),
+        'import_ms': round(sum(packages.values()) / 1000, 1),
+        'heaviest_ms': {package: round(us / 1000, 1) for package, us in heaviest},
+        'deferred_loaded': sorted(name for name in loaded if name.split('.')[0] in DEFERRED_IMPORTS or name in DEFERRED_IMPORTS),
+    }
+
+
+def register(app):
+    @app.cli.group('bench')
+    def bench():
+        """Performance benchmarks."""
+
+    @bench.command('serialization')
+    @click.option('--payments', default=50000, show_default=True)
+    @click.option('--buildings', default=500, show_default=True)
+    @click.option('--repeat', default=3, show_default=True)
+    def bench_serialization(payments, buildings, repeat):
+        """Compare LandlordSchema.dump with the compiled serializer."""
+        result = serialization(payments, buildings, repeat)
+        click.echo(json.dumps(result, indent=2))
+        if not result['identical']:
+            raise click.ClickException('compiled output differs from marshmallow')
+
+    @bench.command('encoding')
+    @click.option('--payments', default=50000, show_default=True)
+    @click.option('--buildings', default=500, show_default=True)
+    @click.option('--repeat', default=3, show_default=True)
+    def bench_encoding(payments, buildings, repeat):
+        """Payload size and decode time per representation and content coding."""
+        click.echo(json.dumps(encodings(payments, buildings, repeat), indent=2))
+
+    @bench.command('sqlite')
+    @click.option('--readers', default=4, show_default=True)
+    @click.option('--writers', default=2, show_default=True)
+    @click.option('--seconds', default=5, show_default=True)
+    def bench_sqlite(readers, writers, seconds):
+        """Compare the default and production SQLite profiles under mixed load."""
+        click.echo(json.dumps(sqlite_profiles(readers, writers, seconds), indent=2))
+
+    @bench.command('search')
+    @click.option('--rows', default=1000000, show_default=True)
+    @click.option('--landlords', default=1000, show_default=True)
+    @click.option('--queries', default=500, show_default=True)
+    def bench_search(rows, landlords, queries):
+        """Prefix autocomplete latency over a scratch database of rows buildings and tenants."""
+        click.echo(json.dumps(search_latency(rows, landlords, queries), indent=2))
+
+    @bench.command('occupancy')
+    @click.option('--leases', default=200000, show_default=True)
+    @click.option('--landlords', default=100, show_default=True)
+    @click.option('--queries', default=200, show_default=True)
+    def bench_occupancy(leases, landlords, queries):
+        """Vacancy, overlap and expiring-soon query latency over a scratch lease table."""
+        click.echo(json.dumps(occupancy_latency(leases, landlords, queries), indent=2))
+
+    @bench.command('endpoints')
+    @click.option('--requests', default=50, show_default=True)
+    @click.option('--baseline', type=click.Path(dir_okay=False), help='Fail on regressions against this saved run.')
+    @click.option('--save', type=click.Path(dir_okay=False), help='Write results here for later comparison.')
+    @click.option('--tolerance', default=0.25, show_default=True, help='Allowed latency/memory growth over baseline.')
+    def bench_endpoints(requests, baseline, save, tolerance):
+        """Latency percentiles, SQL statements and peak memory per endpoint."""
+        results = endpoints(app, requests)
+        click.echo(json.dumps(results, indent=2))
+        if save:
+            with open(save, 'w') as f:
+                json.dump(results, f, indent=2)
+        if baseline:
+            with open(baseline) as f:
+                found = regressions(results, json.load(f), tolerance)
+            if found:
+                raise click.ClickException('regressions:\n' + '\n'.join(found))
+
+    @bench.command('import-time')
+    @click.option('--runs', default=5, show_default=True)
+    @click.option('--budget', default=500.0, show_default=True, help='Fail if create_app() takes longer (ms) from a cold interpreter.')
+    def bench_import_time(runs, budget):
+        """Cold-start import time of create_app(), checked against a budget."""
+        result = import_time(runs)
+        click.echo(json.dumps(result, indent=2))
+        if result['deferred_loaded']:
+            raise click.ClickException(f"imported at startup: {', '.join(result['deferred_loaded'])}")
+        if result['elapsed_ms'] > budget:
+            raise click.ClickException(f"create_app() took {result['elapsed_ms']}ms, budget {budget}ms")
@@ -0,0 +1,110 @@
+import time
+from datetime import date, timedelta
+
+import click
+from sqlalchemy import Boolean, Date, Integer, case, exists, func, insert, literal, select
+
+from server import changefeed
+from server.extensions import db
+from server.models import Payment, RentalBuilding, period_to_month, month_to_period
+
+
+def month_bounds(period_month):
+    year, month = divmod(period_month, 100)
+    first = date(year, month, 1)
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return first, last
+
+
+def _leases(period_month, landlord_id=None):
+    # Every lease active at some point in the month, with the rent it last
+    # billed and whether it already has a row for this period. Both
+    # subqueries seek the (rental_building_id, period_month) index.
+    first, last = month_bounds(period_month)
+    rent = (
+        select(Payment.monthly_price)
+        .where(Payment.rental_building_id == RentalBuilding.id)
+        .order_by(Payment.period_month.desc(), Payment.id.desc())
+        .limit(1)
+        .correlate(RentalBuilding)
+        .scalar_subquery()
+    )
+    billed = exists().where(Payment.rental_building_id == RentalBuilding.id, Payment.period_month == period_month)
+    query = select(RentalBuilding.id, RentalBuilding.landlord_id, rent.label('rent'), billed.label('billed')).where(
+        RentalBuilding.starting_date <= last, RentalBuilding.ending_date >= first
+    )
+    if landlord_id is not None:
+        query = query.where(RentalBuilding.landlord_id == landlord_id)
+    return query.subquery()
+
+
+def generate_payments(payment_period, landlord_id=None):
+    """
+    Create the expected payment for period (MM-YYYY) on every lease active
+    that month, in one INSERT ... SELECT. Rows are unpaid, due on the 1st,
+    and carry forward the lease's most recent monthly_price; leases never
+    billed before have no rent to copy and are counted as missing_rent.
+    Leases that already have a row for the period are left alone.
+    """
+    period_month = period_to_month(payment_period)
+    first, _ = month_bounds(period_month)
+    started = time.perf_counter()
+
+    leases = _leases(period_month, landlord_id)
+    active, billed, missing_rent = db.session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((leases.c.billed, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((leases.c.rent.is_(None), 1), else_=0)), 0),
+        ).select_from(leases)
+    ).one()
+
+    after_id = changefeed.last_id(Payment)
+    result = db.session.execute(
+        insert(Payment).from_select(
+            ['monthly_price', 'price', 'payment_status', 'payment_date', 'due_date', 'period_month', 'rental_building_id',
+             'landlord_id'],
+            select(
+                leases.c.rent,
+                leases.c.rent,
+                literal(False, Boolean),
+                literal(first, Date),
+                literal(first, Date),
+                literal(period_month, Integer),
+                leases.c.id,
+                leases.c.landlord_id,
+            ).where(leases.c.billed.is_(False), leases.c.rent.isnot(None))
+        )
+    )
+    if result.rowcount:
+        criteria = [Payment.period_month == period_month]
+        if landlord_id is not None:
+            criteria.append(RentalBuilding.landlord_id == landlord_id)
+        changefeed.record_inserted(Payment, after_id, *criteria)
+    db.session.commit()
+
+    return {
+        'payment_period': month_to_period(period_month),
+        'active_leases': active,
+        'created': result.rowcount,
+        'already_billed': billed,
+        'missing_rent': missing_rent,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def register(app):
+    @app.cli.command('generate-payments')
+    @click.argument('payment_period')
+    @click.option('--landlord-id', type=int, default=None, help='Only this landlord\'s leases.')
+    def generate_payments_command(payment_period, landlord_id):
+        """Create the expected payments for PAYMENT_PERIOD (MM-YYYY) on every active lease."""
+        try:
+            result = generate_payments(payment_period, landlord_id)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"{result['payment_period']}: {result['created']} created, {result['already_billed']} already billed, "
+            f"{result['missing_rent']} without a previous rent, {result['active_leases']} active leases "
+            f"in {result['elapsed_ms']}ms"
+        )
@@ -0,0 +1,201 @@
+import csv
+import json
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import click
+from sqlalchemy import Boolean, Date, Integer, inspect, insert, select
+
+from server.extensions import db
+from server import changefeed
+from server.models import Tenant, RentalBuilding, Payment, period_to_month
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 1000
+
+MODELS = {
+    'tenants': Tenant,
+    'rental_buildings': RentalBuilding,
+    'payments': Payment,
+}
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def read_rows(text, fmt):
+    # JSONL lines are yielded undecoded so a malformed line fails on its own row.
+    if fmt == 'csv':
+        for row in csv.DictReader(text):
+            yield {k: (v if v != '' else None) for k, v in row.items()}
+    elif fmt == 'jsonl':
+        for line in text:
+            line = line.strip()
+            if line:
+                yield line
+    else:
+        raise BulkImportError('format must be csv or jsonl')
+
+
+def _coerce(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, Boolean):
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in ('true', '1', 'yes'):
+            return True
+        if str(value).lower() in ('false', '0', 'no'):
+            return False
+        raise ValueError(f'{column.key} must be true or false')
+    if isinstance(column.type, Date):
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            raise ValueError(f'{column.key} must be a valid date in YYYY-MM-DD format.')
+    if isinstance(column.type, Integer):
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            raise ValueError(f'{column.key} must be a number')
+    return value
+
+
+class RowValidator:
+    # Runs the model's own @validates hooks against plain dicts, in column
+    # order, so a row is accepted exactly when the ORM would accept it.
+
+    def __init__(self, model):
+        mapper = inspect(model)
+        self.model = model
+        self.columns = [c for c in mapper.columns if not c.primary_key and c.key != 'landlord_id']
+        self.validators = {key: fn for key, (fn, _) in mapper.validators.items()}
+
+    def __call__(self, raw):
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        if not isinstance(raw, dict):
+            raise ValueError('row must be an object')
+        if self.model is Payment and raw.get('payment_period') is not None and raw.get('period_month') is None:
+            raw = dict(raw, period_month=period_to_month(raw['payment_period']))
+
+        row = {}
+        target = SimpleNamespace()
+        for column in self.columns:
+            value = _coerce(column, raw.get(column.key))
+            if column.key in self.validators:
+                value = self.validators[column.key](target, column.key, value)
+            elif value is None and not column.nullable:
+                raise ValueError(f'{column.key} is required')
+            setattr(target, column.key, value)
+            row[column.key] = value
+        return row
+
+
+def _owned_ids(column, landlord_column, landlord_id, ids):
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(column).where(landlord_column == landlord_id, column.in_(ids))))
+
+
+def _check_chunk(kind, landlord_id, chunk, seen_addresses):
+    # Returns {index: error} for rows that clash with the database or each other,
+    # using one IN query per referenced table rather than one per row.
+    errors = {}
+    if kind == 'rental_buildings':
+        addresses = [row['address'] for _, row in chunk]
+        existing = set(db.session.scalars(select(RentalBuilding.address).where(RentalBuilding.address.in_(addresses))))
+        tenants = _owned_ids(Tenant.id, Tenant.landlord_id, landlord_id, (row['tenant_id'] for _, row in chunk))
+        for index, row in chunk:
+            if row['address'] in existing or row['address'] in seen_addresses:
+                errors[index] = 'A rental building with this address already exists'
+            elif row['tenant_id'] is not None and row['tenant_id'] not in tenants:
+                errors[index] = 'tenant not found'
+            else:
+                seen_addresses.add(row['address'])
+    elif kind == 'payments':
+        buildings = _owned_ids(
+            RentalBuilding.id, RentalBuilding.landlord_id, landlord_id,
+            (row['rental_building_id'] for _, row in chunk)
+        )
+        for index, row in chunk:
+            if row['rental_building_id'] not in buildings:
+                errors[index] = 'rental building not found'
+    return errors
+
+
+def import_rows(kind, landlord_id, rows):
+    if kind not in MODELS:
+        raise BulkImportError(f"kind must be one of {', '.join(MODELS)}")
+    model = MODELS[kind]
+    validate = RowValidator(model)
+    table = model.__table__
+
+    inserted = 0
+    failed = 0
+    errors = []
+    seen_addresses = set()
+    after_id = changefeed.last_id(model)
+
+    def report(index, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_ERRORS:
+            errors.append({'row': index, 'error': message})
+
+    def flush(chunk):
+        nonlocal inserted
+        conflicts = _check_chunk(kind, landlord_id, chunk, seen_addresses)
+        for index, message in conflicts.items():
+            report(index, message)
+        values = [row for index, row in chunk if index not in conflicts]
+        if values:
+            if kind != 'payments':
+                for row in values:
+                    row['landlord_id'] = landlord_id
+            db.session.execute(insert(table), values)
+            inserted += len(values)
+
+    chunk = []
+    try:
+        for index, raw in enumerate(rows, start=1):
+            try:
+                chunk.append((index, validate(raw)))
+            except (ValueError, TypeError, AttributeError) as e:
+                report(index, str(e))
+                continue
+            if len(chunk) >= CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+        if inserted:
+            owner = RentalBuilding.landlord_id if kind == 'payments' else model.landlord_id
+            changefeed.record_inserted(model, after_id, owner == landlord_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    errors.sort(key=lambda error: error['row'])
+    return {'inserted': inserted, 'failed': failed, 'errors': errors}
+
+
+def register(app):
+    @app.cli.command('import-data')
+    @click.argument('kind', type=click.Choice(list(MODELS)))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--landlord-id', type=int, required=True)
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None)
+    def import_data(kind, path, landlord_id, fmt):
+        """Bulk load tenants, rental buildings or payments from CSV or JSONL."""
+        fmt = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+        with open(path, encoding='utf-8', newline='') as f:
+            result = import_rows(kind, landlord_id, read_rows(f, fmt))
+        for error in result['errors']:
+            click.echo(f"row {error['row']}: {error['error']}", err=True)
+        click.echo(f"inserted {result['inserted']} {kind}, {result['failed']} failed")
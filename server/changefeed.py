@@ -0,0 +1,196 @@
+import time
+
+import click
+from flask import current_app
+from sqlalchemy import event, func, inspect, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from server import jobs
+from server.extensions import db
+from server.models import Change, Landlord, Payment, RentalBuilding, Tenant, Watermark
+
+HORIZON = 'changes'
+ENTITIES = {
+    Landlord: 'landlord',
+    Tenant: 'tenant',
+    RentalBuilding: 'rental_building',
+    Payment: 'payment',
+}
+DEFAULT_LIMIT = 200
+
+# Rows are written inside the flushing transaction, so a change is logged
+# exactly when its data commits. SQLite holds the write lock from a
+# transaction's first write to its commit, so seq order is commit order and
+# a reader never sees seq n+1 before n.
+
+
+def _history(obj, key):
+    history = inspect(obj).attrs[key].history
+    current = {v for v in (*history.added, *history.unchanged) if v is not None}
+    removed = {v for v in history.deleted if v is not None} - current
+    return current, removed
+
+
+def _changes(session, flush_context):
+    now = int(time.time())
+    pending = []
+    building_ids = set()
+    for objects, operation in ((session.new, 'insert'), (session.dirty, 'update'), (session.deleted, 'delete')):
+        for obj in objects:
+            entity = ENTITIES.get(type(obj))
+            if entity is None or (operation == 'update' and not session.is_modified(obj)):
+                continue
+            if isinstance(obj, Landlord):
+                pending.append(({obj.id}, set(), entity, obj.id, operation))
+                # landlord_property_type rows are the landlord's property_types collection
+                history = inspect(obj).attrs.property_types.history
+                pending += [({obj.id}, set(), 'landlord_property_type', t.id, 'insert') for t in history.added]
+                pending += [({obj.id}, set(), 'landlord_property_type', t.id, 'delete') for t in history.deleted]
+            elif isinstance(obj, Payment):
+                current, removed = _history(obj, 'rental_building_id')
+                building_ids |= current | removed
+                pending.append((current, removed, entity, obj.id, operation))
+            else:
+                current, removed = _history(obj, 'landlord_id')
+                pending.append((current, removed, entity, obj.id, operation))
+
+    landlords = {}
+    if building_ids:
+        landlords = dict(session.connection().execute(
+            select(RentalBuilding.id, RentalBuilding.landlord_id).where(RentalBuilding.id.in_(building_ids))
+        ).all())
+
+    rows = []
+    for current, removed, entity, entity_id, operation in pending:
+        if entity == 'payment':
+            current = {landlords.get(b) for b in current}
+            removed = {landlords.get(b) for b in removed} - current
+        # An entity moved away from a landlord is a delete as far as that landlord can see.
+        for landlord_id, op in (*((l, operation) for l in current), *((l, 'delete') for l in removed)):
+            if landlord_id is not None:
+                rows.append({
+                    'landlord_id': landlord_id, 'entity': entity, 'entity_id': entity_id,
+                    'operation': op, 'created_at': now,
+                })
+    return rows
+
+
+@event.listens_for(Session, 'after_flush')
+def _record(session, flush_context):
+    rows = _changes(session, flush_context)
+    if rows:
+        session.connection().execute(insert(Change), rows)
+
+
+def last_id(model):
+    return db.session.scalar(select(func.max(model.id))) or 0
+
+
+def record(landlord_id, model, entity_id, operation='insert'):
+    # For single-row Core writes such as the ON CONFLICT inserts in app.py.
+    db.session.execute(insert(Change).values(
+        landlord_id=landlord_id, entity=ENTITIES[model], entity_id=entity_id,
+        operation=operation, created_at=int(time.time()),
+    ))
+
+
+def record_inserted(model, after_id, *criteria):
+    """
+    Log Core inserts, which never reach the flush hook: every model row with
+    id > after_id (read before the insert) matching criteria. A concurrent
+    writer's rows can only show up twice, never go missing.
+    """
+    if model is Payment:
+        rows = select(RentalBuilding.landlord_id, Payment.id).join(RentalBuilding, Payment.rental_building_id == RentalBuilding.id)
+    else:
+        rows = select(model.landlord_id, model.id)
+    rows = rows.where(model.id > after_id, *criteria).subquery()
+    db.session.execute(
+        insert(Change).from_select(
+            ['landlord_id', 'entity', 'entity_id', 'operation', 'created_at'],
+            select(
+                rows.c[0], literal(ENTITIES[model]), rows.c[1], literal('insert'), literal(int(time.time()))
+            ).where(rows.c[0].isnot(None))
+        )
+    )
+
+
+def horizon():
+    row = db.session.get(Watermark, HORIZON)
+    return row.position if row and row.position else 0
+
+
+def changes_since(landlord_id, since, limit=DEFAULT_LIMIT):
+    """
+    Entries after since for landlord_id, oldest first. reset means since is
+    older than the compacted horizon and the client has to refetch
+    /check_session; with since=None it only reports where to start from.
+    """
+    latest = db.session.scalar(select(func.max(Change.seq))) or 0
+    if since is None:
+        return {'changes': [], 'next_since': latest, 'has_more': False, 'reset': False}
+    if since < horizon():
+        return {'changes': [], 'next_since': latest, 'has_more': False, 'reset': True}
+
+    rows = db.session.execute(
+        select(Change.seq, Change.entity, Change.entity_id, Change.operation)
+        .where(Change.landlord_id == landlord_id, Change.seq > since)
+        .order_by(Change.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'changes': [
+            {'seq': seq, 'entity': entity, 'id': entity_id, 'operation': operation}
+            for seq, entity, entity_id, operation in rows
+        ],
+        # past other landlords' entries too, so an idle client doesn't rescan them
+        'next_since': rows[-1][0] if has_more else max(latest, since, *(row[0] for row in rows[-1:])),
+        'has_more': has_more,
+        'reset': False,
+    }
+
+
+def compact(retention, max_rows, now=None):
+    """
+    Keep the log bounded: drop entries older than retention seconds or
+    beyond the newest max_rows, moving the horizon past them, then drop
+    entries superseded by a later one for the same landlord and entity.
+    Clients treat insert and update alike as upserts, so the latter is safe.
+    """
+    now = now or time.time()
+    latest = db.session.scalar(select(func.max(Change.seq))) or 0
+    first_kept = db.session.scalar(
+        select(Change.seq).where(Change.created_at >= int(now - retention)).order_by(Change.seq).limit(1)
+    )
+    cutoff = max(horizon(), (first_kept or latest + 1) - 1, latest - max_rows)
+
+    expired = db.session.execute(db.delete(Change).where(Change.seq <= cutoff)).rowcount
+    latest_per_entity = select(func.max(Change.seq)).group_by(Change.landlord_id, Change.entity, Change.entity_id)
+    superseded = db.session.execute(db.delete(Change).where(Change.seq.not_in(latest_per_entity))).rowcount
+    db.session.execute(
+        sqlite_insert(Watermark)
+        .values(name=HORIZON, position=cutoff)
+        .on_conflict_do_update(index_elements=['name'], set_={'position': cutoff})
+    )
+    db.session.commit()
+    return {'expired': expired, 'superseded': superseded, 'horizon': cutoff}
+
+
+def _compact_job():
+    config = current_app.config
+    compact(config.get('CHANGES_RETENTION', 7 * 86400), config.get('CHANGES_MAX_ROWS', 1000000))
+
+
+def init_app(app):
+    jobs.schedule(app, 'changefeed', 'CHANGES_COMPACT_INTERVAL', 3600, _compact_job)
+
+
+def register(app):
+    @app.cli.command('compact-changes')
+    def compact_changes_command():
+        """Expire old change-log entries and drop superseded ones."""
+        result = compact(app.config.get('CHANGES_RETENTION', 7 * 86400), app.config.get('CHANGES_MAX_ROWS', 1000000))
+        click.echo(f"{result['expired']} expired, {result['superseded']} superseded, horizon {result['horizon']}")
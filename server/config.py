@@ -2,11 +2,83 @@ import os
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
+
+def sqlite_readonly_uri(uri):
+    # sqlite:////abs/app.db -> sqlite:///file:/abs/app.db?mode=ro&uri=true
+    prefix = 'sqlite:///'
+    if not uri.startswith(prefix) or uri == 'sqlite:///:memory:':
+        return None
+    return f'{prefix}file:{uri[len(prefix):]}?mode=ro&uri=true'
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     # SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_default_secret_key'
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, 'instance', 'app.db')}"
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'instance', 'app.db')}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SESSION_TYPE = 'filesystem'
+    SESSION_TYPE = 'sqlite'
     SESSION_PERMANENT = True
-    SESSION_FILE_DIR = os.path.join(BASE_DIR, 'flask_session')
\ No newline at end of file
+    SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH', os.path.join(BASE_DIR, 'instance', 'sessions.db'))
+    # decoded sessions kept in memory in front of SQLite, 0 disables the cache
+    SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', 10000))
+    # seconds between sweeps of expired sessions, 0 disables the sweeper
+    SESSION_SWEEP_INTERVAL = int(os.getenv('SESSION_SWEEP_INTERVAL', 300))
+    IDEMPOTENCY_SQLITE_PATH = os.getenv('IDEMPOTENCY_SQLITE_PATH', os.path.join(BASE_DIR, 'instance', 'idempotency.db'))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 10000))
+    # seconds a stored response can be replayed for
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 86400))
+    # bcrypt cost factor; stored hashes below it are upgraded on the next login
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # size of the bcrypt process pool, 0 hashes inline on the request thread
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 1))
+    # statements slower than this (ms) go to the server.slow_queries logger, 0 disables
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+    # optional file for the slow-query log, otherwise it follows the root logger
+    SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG')
+    # requests per endpoint kept for /metrics/requests
+    METRICS_WINDOW = int(os.getenv('METRICS_WINDOW', 1000))
+    # seconds between overdue-payment detection passes, 0 disables the scheduler
+    OVERDUE_INTERVAL = int(os.getenv('OVERDUE_INTERVAL', 3600))
+    # change-log entries older than this (seconds) or beyond the newest CHANGES_MAX_ROWS are compacted away
+    CHANGES_RETENTION = int(os.getenv('CHANGES_RETENTION', 7 * 86400))
+    CHANGES_MAX_ROWS = int(os.getenv('CHANGES_MAX_ROWS', 1000000))
+    # seconds between change-log compactions, 0 disables the job
+    CHANGES_COMPACT_INTERVAL = int(os.getenv('CHANGES_COMPACT_INTERVAL', 3600))
+    # sub-operations accepted by one POST /batch
+    BATCH_MAX_OPERATIONS = int(os.getenv('BATCH_MAX_OPERATIONS', 50))
+    # responses smaller than this (bytes) go out uncompressed; streamed exports are always compressed when accepted
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+
+class ProductionConfig(Config):
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': 30,
+    }
+    # GET requests read through a readonly bind, see RoutingSession. Without
+    # READONLY_DATABASE_URL it is a read-only view of whatever
+    # SQLALCHEMY_DATABASE_URI the app ends up with, see engine.configure.
+    READONLY_READS = True
+    READONLY_DATABASE_URI = os.getenv('READONLY_DATABASE_URL')
+    # several workers serve one user's requests, and a worker's cached copy of
+    # a session would miss another worker's writes to it
+    SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', 0))
+
+
+CONFIGS = {
+    'development': Config,
+    'production': ProductionConfig,
+}
+
+
+def config_for(env=None):
+    return CONFIGS[env or os.getenv('APP_ENV', 'development')]
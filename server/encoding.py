@@ -0,0 +1,139 @@
+import zlib
+from importlib import import_module
+from importlib.util import find_spec
+
+from flask import current_app, make_response, request
+from flask_restful.representations.json import output_json
+
+from server.instrumentation import timed
+
+# msgpack and zstandard are optional: without them the msgpack media types
+# and the zstd coding are simply not offered, and clients get JSON and gzip.
+# Both are imported on first use so they stay off the cold-start path.
+HAS_MSGPACK = find_spec('msgpack') is not None
+HAS_ZSTD = find_spec('zstandard') is not None
+
+COLUMNS_JSON = 'application/vnd.renttrack.columns+json'
+MSGPACK = 'application/msgpack'
+COLUMNS_MSGPACK = 'application/vnd.renttrack.columns+msgpack'
+
+# Bodies these types carry are what the API sends in bulk; everything else
+# (the index page, 304s, errors from outside the API) is left as it is.
+NEGOTIATED = ('application/json', COLUMNS_JSON, MSGPACK, COLUMNS_MSGPACK)
+COMPRESSIBLE = NEGOTIATED + ('application/x-ndjson',)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def columns(data):
+    """
+    Every list of objects turned into one object of per-field lists,
+    recursively, so a payment array repeats each key once instead of once per
+    row. A row missing a field gets null in that column.
+    """
+    if isinstance(data, dict):
+        return {key: columns(value) for key, value in data.items()}
+    if isinstance(data, list):
+        if data and all(isinstance(row, dict) for row in data):
+            fields = dict.fromkeys(key for row in data for key in row)
+            return {field: columns([row.get(field) for row in data]) for field in fields}
+        return [columns(value) for value in data]
+    return data
+
+
+def output_columns_json(data, code, headers=None):
+    return output_json(columns(data), code, headers)
+
+
+def output_msgpack(data, code, headers=None):
+    msgpack = import_module('msgpack')
+    response = make_response(msgpack.packb(data, use_bin_type=True, default=str), code)
+    response.headers.extend(headers or {})
+    return response
+
+
+def output_columns_msgpack(data, code, headers=None):
+    return output_msgpack(columns(data), code, headers)
+
+
+def representations():
+    found = {COLUMNS_JSON: output_columns_json}
+    if HAS_MSGPACK:
+        found.update({MSGPACK: output_msgpack, COLUMNS_MSGPACK: output_columns_msgpack})
+    return found
+
+
+def compressor(coding):
+    # zlib's and zstandard's compressobj share compress()/flush()
+    if coding == 'zstd':
+        return import_module('zstandard').ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def sync_flush(coding):
+    # the flush mode that ends the current block without ending the stream
+    if coding == 'zstd':
+        return import_module('zstandard').COMPRESSOBJ_FLUSH_BLOCK
+    return zlib.Z_SYNC_FLUSH
+
+
+def negotiate():
+    offered = ('zstd', 'gzip') if HAS_ZSTD else ('gzip',)
+    return request.accept_encodings.best_match(offered)
+
+
+def _compressed_chunks(coding, chunks):
+    # Flushed after every upstream chunk, so the client can decode each one as
+    # it arrives instead of waiting for the compressor's window to fill. The
+    # export already batches rows into ~64KB chunks, which keeps the cost of a
+    # block boundary per chunk small.
+    stream = compressor(coding)
+    mode = sync_flush(coding)
+    for chunk in chunks:
+        out = stream.compress(chunk) + stream.flush(mode)
+        if out:
+            yield out
+    yield stream.flush()
+
+
+def compress(response):
+    response.vary.add('Accept-Encoding')
+    if response.mimetype in NEGOTIATED:
+        response.vary.add('Accept')
+    if (
+        request.method == 'HEAD'
+        or response.status_code in (204, 304)
+        or response.status_code < 200
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE
+    ):
+        return response
+    coding = negotiate()
+    if coding is None:
+        return response
+
+    if response.is_streamed:
+        # size unknown until the end; a streamed body is an export, big by nature
+        response.response = _compressed_chunks(coding, response.iter_encoded())
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+        with timed('compress'):
+            stream = compressor(coding)
+            response.set_data(stream.compress(body) + stream.flush())
+
+    response.headers['Content-Encoding'] = coding
+    # the bytes differ per coding, the representation doesn't
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app, api):
+    for mediatype, output in representations().items():
+        api.representations[mediatype] = output
+    app.after_request(compress)
@@ -0,0 +1,40 @@
+from sqlalchemy import event
+
+from server.config import sqlite_readonly_uri
+from server.extensions import db, READONLY_BIND
+
+
+def apply_pragmas(engine, pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    event.listen(engine, 'connect', on_connect)
+
+
+def configure(app):
+    # Before db.init_app, once the config is final: the readonly bind has to
+    # follow an overridden SQLALCHEMY_DATABASE_URI, not the one at import time.
+    if not app.config.get('READONLY_READS'):
+        return
+    uri = app.config.get('READONLY_DATABASE_URI') or sqlite_readonly_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    if uri:
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), READONLY_BIND: uri}
+
+
+def init_app(app):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            if key == READONLY_BIND:
+                # journal_mode is a property of the file, set by the writer side
+                readonly = {k: v for k, v in pragmas.items() if k != 'journal_mode'}
+                apply_pragmas(engine, {**readonly, 'query_only': 'ON'})
+            else:
+                apply_pragmas(engine, pragmas)
@@ -0,0 +1,87 @@
+import re
+
+import click
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+
+from server.extensions import db
+from server.models import Landlord, RentalBuilding
+
+# Tables the request paths are expected to reach only through an index.
+INDEXED_TABLES = ('landlords', 'tenants', 'rental_buildings', 'payments', 'property_types', 'landlord_property_type')
+
+# SQLite before 3.36 says SCAN TABLE x; a SCAN ... USING INDEX walks the whole
+# index, which is no better than the table once it is large.
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: USING (?:COVERING )?INDEX \w+)?$')
+# Sorting the whole result means reading all of it before the first row,
+# whatever the LIMIT.
+SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def capture_statements(app, landlord_id, rental_building_id):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    paths = [
+        '/check_session',
+        '/rental_buildings?property_type_id=1',
+        '/tenants',
+        f'/payments?rental_building_id={rental_building_id}',
+        '/payments?due_from=2024-01-01&due_to=2024-12-31',
+        '/search?q=ma',
+        '/payments/overdue',
+        '/rental_buildings/occupancy/vacant?from=2024-01-01&to=2024-02-01',
+    ]
+
+    # On the Engine class: under the production profile GETs read through
+    # the readonly bind, not db.engine.
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['landlord_id'] = landlord_id
+            for path in paths:
+                client.get(path)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+    return statements
+
+
+def full_scans(statement, parameters):
+    plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        match = FULL_SCAN.match(detail)
+        if (match and match.group(1) in INDEXED_TABLES) or detail == SORT:
+            scans.append(detail)
+    return scans
+
+
+def check_query_plans(app):
+    landlord_id = db.session.scalar(select(Landlord.id).order_by(Landlord.id).limit(1)) or 1
+    rental_building_id = db.session.scalar(
+        select(RentalBuilding.id).where(RentalBuilding.landlord_id == landlord_id).limit(1)
+    ) or 1
+
+    failures = []
+    for statement, parameters in capture_statements(app, landlord_id, rental_building_id):
+        scans = full_scans(statement, parameters)
+        if scans:
+            failures.append((statement, scans))
+    return failures
+
+
+def register(app):
+    @app.cli.command('check-indexes')
+    def check_indexes():
+        """Fail if any request-path query plans a full table or index scan, or a full sort."""
+        failures = check_query_plans(app)
+        for statement, scans in failures:
+            click.echo(f"{', '.join(scans)}\n    {' '.join(statement.split())}\n", err=True)
+        if failures:
+            raise click.ClickException(f'{len(failures)} queries scan or sort a whole table')
+        click.echo('all request-path queries use an index')
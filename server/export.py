@@ -0,0 +1,139 @@
+import json
+
+from sqlalchemy import select
+
+from server import loaders
+from server.extensions import db
+from server.models import Landlord, Tenant, RentalBuilding, PropertyType, landlord_property_type
+from server.schemas import LandlordSchema
+from server.serializers import RowSerializer, PaymentRows
+
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024
+
+
+def _nested(name, drop=()):
+    field = LandlordSchema._declared_fields[name]
+    only = tuple(f for f in field.only if f not in drop) if field.only else None
+    return loaders.nested_schema(field), only
+
+
+class PortfolioExport:
+    """
+    Streams a landlord's portfolio straight off database cursors, buildings and
+    payments both in id order and merged as they go, so memory is bounded by one
+    building's payments rather than the portfolio.
+    """
+
+    def __init__(self):
+        self.landlord = RowSerializer(Landlord, LandlordSchema, only=('id', 'username'))
+        self.tenants = RowSerializer(Tenant, *_nested('tenants'))
+        self.buildings = RowSerializer(RentalBuilding, *_nested('rental_buildings', drop=('payments',)))
+        self.property_types = RowSerializer(PropertyType, *_nested('property_types'))
+        self.payments = PaymentRows()
+
+    def _stream(self, query):
+        return db.session.execute(query.execution_options(yield_per=YIELD_PER))
+
+    def landlord_row(self, landlord_id):
+        row = db.session.execute(select(*self.landlord.columns).where(Landlord.id == landlord_id)).first()
+        return self.landlord.dump(row) if row else None
+
+    def tenant_rows(self, landlord_id):
+        query = select(*self.tenants.columns).where(Tenant.landlord_id == landlord_id).order_by(Tenant.id)
+        for row in self._stream(query):
+            yield self.tenants.dump(row)
+
+    def property_type_rows(self, landlord_id):
+        query = (
+            select(*self.property_types.columns)
+            .join(landlord_property_type, landlord_property_type.c.property_type_id == PropertyType.id)
+            .where(landlord_property_type.c.landlord_id == landlord_id)
+            .order_by(PropertyType.id)
+        )
+        for row in self._stream(query):
+            yield self.property_types.dump(row)
+
+    def building_rows(self, landlord_id):
+        buildings = self._stream(
+            select(*self.buildings.columns).where(RentalBuilding.landlord_id == landlord_id).order_by(RentalBuilding.id)
+        )
+        payments = iter(self._stream(self.payments.landlord_query(landlord_id)))
+        index = self.payments.building_index
+        pending = next(payments, None)
+        for row in buildings:
+            building = self.buildings.dump(row)
+            building_payments = []
+            while pending is not None and pending[index] <= building['id']:
+                if pending[index] == building['id']:
+                    building_payments.append(self.payments.dump(pending))
+                pending = next(payments, None)
+            yield building, building_payments
+
+
+def _buffered(parts):
+    # Join small writes into ~64KB chunks; an empty part forces a flush so the
+    # header goes out before the first big query runs.
+    buffer = []
+    size = 0
+    for part in parts:
+        if part:
+            buffer.append(part)
+            size += len(part)
+        if size >= CHUNK_BYTES or (not part and buffer):
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def ndjson(export, landlord_id, landlord):
+    def parts():
+        yield json.dumps({'type': 'landlord', 'data': landlord}) + '\n'
+        yield ''
+        for tenant in export.tenant_rows(landlord_id):
+            yield json.dumps({'type': 'tenant', 'data': tenant}) + '\n'
+        for property_type in export.property_type_rows(landlord_id):
+            yield json.dumps({'type': 'property_type', 'data': property_type}) + '\n'
+        for building, payments in export.building_rows(landlord_id):
+            yield json.dumps({'type': 'rental_building', 'data': building}) + '\n'
+            for payment in payments:
+                yield json.dumps({'type': 'payment', 'data': payment}) + '\n'
+    return _buffered(parts())
+
+
+def chunked_json(export, landlord_id, landlord):
+    # Same document /check_session returns, written incrementally.
+    def array(items):
+        first = True
+        for item in items:
+            yield item if first else ', ' + item
+            first = False
+
+    def parts():
+        yield json.dumps(landlord)[:-1] + ', "tenants": ['
+        yield ''
+        yield from array(json.dumps(t) for t in export.tenant_rows(landlord_id))
+        yield '], "rental_buildings": ['
+        yield from array(
+            json.dumps({**building, 'payments': payments}) for building, payments in export.building_rows(landlord_id)
+        )
+        yield '], "property_types": ['
+        yield from array(json.dumps(p) for p in export.property_type_rows(landlord_id))
+        yield ']}\n'
+    return _buffered(parts())
+
+
+_export = None
+
+
+def stream_portfolio(landlord_id, fmt='ndjson'):
+    global _export
+    if _export is None:
+        _export = PortfolioExport()
+    landlord = _export.landlord_row(landlord_id)
+    if landlord is None:
+        return None
+    writer = chunked_json if fmt == 'json' else ndjson
+    return writer(_export, landlord_id, landlord)
@@ -1,7 +1,43 @@
+from flask import has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
+from flask_sqlalchemy.session import Session
 from flask_bcrypt import Bcrypt
 
-db = SQLAlchemy()
+READONLY_BIND = 'readonly'
+# session.info key for the connection a /batch runs every statement on, see server/batch.py
+BATCH_CONNECTION = 'batch_connection'
+
+
+class RoutingSession(Session):
+    # GET/HEAD requests read through the 'readonly' bind when one is configured;
+    # anything flushed still goes to the primary engine. Inside a batch
+    # everything, reads included, joins the batch's transaction.
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and BATCH_CONNECTION in self.info:
+            return self.info[BATCH_CONNECTION]
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and request.method in ('GET', 'HEAD')
+            and READONLY_BIND in self._db.engines
+        ):
+            return self._db.engines[READONLY_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
-ma = Marshmallow()
\ No newline at end of file
+
+
+def __getattr__(name):
+    # flask_marshmallow imports marshmallow_sqlalchemy, ~100ms that only
+    # server.schemas needs, so ma is built the first time something asks.
+    if name == 'ma':
+        global ma
+        from flask_marshmallow import Marshmallow
+        ma = Marshmallow()
+        # what ma.init_app attaches: db.session is one scoped session for every app
+        ma.SQLAlchemyAutoSchema.OPTIONS_CLASS.session = db.session
+        return ma
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
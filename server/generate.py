@@ -0,0 +1,149 @@
+import random
+import time
+from datetime import date, timedelta
+
+import click
+from sqlalchemy import func, insert, select
+
+from server import hashing
+from server.extensions import db
+from server.models import Landlord, Tenant, RentalBuilding, PropertyType, Payment, landlord_property_type
+
+CHUNK_SIZE = 10000
+PASSWORD = 'Password123!'
+PROPERTY_TYPES = ('Apartment', 'House', 'Condo', 'Townhouse', 'Studio')
+OCCUPATIONS = ('Engineer', 'Teacher', 'Designer', 'Nurse', 'Accountant', 'Chef', 'Driver', 'Lawyer', 'Student', 'Artist')
+
+
+def _next_id(model):
+    return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def _insert_chunks(table, rows):
+    chunk = []
+    count = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            db.session.execute(insert(table), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def _add_months(d, months):
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def generate(landlords=10, buildings=200, payments=2400, seed=0, echo=lambda message: None):
+    """
+    Append a synthetic portfolio: buildings are spread evenly over the new
+    landlords, each building gets its own tenant and about payments/buildings
+    monthly payments from its starting date. Rows go in through Core
+    executemany chunks; every landlord's password is PASSWORD.
+    """
+    if landlords < 1:
+        raise ValueError('landlords must be at least 1')
+    # imported here: faker costs ~40ms to import and only this command uses it
+    from faker import Faker
+
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    # Faker is slow per call, so draw pools once and combine them.
+    first_names = [n for n in (fake.first_name() for _ in range(500)) if 3 <= len(n) <= 50] or ['Alice']
+    last_names = [n for n in (fake.last_name() for _ in range(500)) if 3 <= len(n) <= 50] or ['Walker']
+    streets = [fake.street_name() for _ in range(500)]
+
+    password_hash = hashing.hash_password(PASSWORD)
+    started = time.perf_counter()
+
+    type_ids = list(db.session.scalars(select(PropertyType.id).order_by(PropertyType.id)))
+    if not type_ids:
+        first = _next_id(PropertyType)
+        db.session.execute(insert(PropertyType), [
+            {'id': first + i, 'property_type_name': name} for i, name in enumerate(PROPERTY_TYPES)
+        ])
+        type_ids = [first + i for i in range(len(PROPERTY_TYPES))]
+
+    landlord_start = _next_id(Landlord)
+    landlord_ids = list(range(landlord_start, landlord_start + landlords))
+    _insert_chunks(Landlord.__table__, (
+        {'id': i, 'username': f'{fake.user_name()[:40]}{i}', 'password_hash': password_hash} for i in landlord_ids
+    ))
+    _insert_chunks(landlord_property_type, (
+        {'landlord_id': i, 'property_type_id': t}
+        for i in landlord_ids for t in rng.sample(type_ids, rng.randint(1, min(3, len(type_ids))))
+    ))
+    echo(f'{landlords} landlords')
+
+    building_start = _next_id(RentalBuilding)
+    tenant_start = _next_id(Tenant)
+    leases = []
+
+    def building_rows():
+        for n in range(buildings):
+            building_id = building_start + n
+            starting = date(rng.randint(2019, 2024), rng.randint(1, 12), 1)
+            leases.append((building_id, landlord_ids[n % landlords], starting))
+            yield {
+                'id': building_id,
+                'address': f'{building_id} {rng.choice(streets)}'[:200],
+                'starting_date': starting,
+                'ending_date': _add_months(starting, rng.choice((6, 12, 24))),
+                'landlord_id': landlord_ids[n % landlords],
+                'tenant_id': tenant_start + n,
+                'property_type_id': rng.choice(type_ids),
+            }
+
+    _insert_chunks(Tenant.__table__, (
+        {
+            'id': tenant_start + n,
+            'first_name': rng.choice(first_names),
+            'last_name': rng.choice(last_names),
+            'telephone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+            'occupation': rng.choice(OCCUPATIONS),
+            'landlord_id': landlord_ids[n % landlords],
+        }
+        for n in range(buildings)
+    ))
+    _insert_chunks(RentalBuilding.__table__, building_rows())
+    echo(f'{buildings} tenants and rental buildings')
+
+    def payment_rows():
+        per_building, extra = divmod(payments, buildings) if buildings else (0, 0)
+        for n, (building_id, landlord_id, starting) in enumerate(leases):
+            rent = rng.randrange(800, 4000, 50)
+            for month in range(per_building + (1 if n < extra else 0)):
+                due = _add_months(starting, month)
+                paid = rng.random() > 0.1
+                yield {
+                    'monthly_price': rent,
+                    'price': rent if paid else rng.randrange(100, rent, 50),
+                    'payment_status': paid,
+                    'payment_date': due + timedelta(days=rng.choice((0, 0, 0, 1, 3, 9, 20))),
+                    'due_date': due,
+                    'period_month': due.year * 100 + due.month,
+                    'rental_building_id': building_id,
+                    'landlord_id': landlord_id,
+                }
+
+    count = _insert_chunks(Payment.__table__, payment_rows())
+    db.session.commit()
+    echo(f'{count} payments in {time.perf_counter() - started:.1f}s')
+    return {'landlords': landlords, 'buildings': buildings, 'payments': count}
+
+
+def register(app):
+    @app.cli.command('generate')
+    @click.option('--landlords', default=10, show_default=True)
+    @click.option('--buildings', default=200, show_default=True)
+    @click.option('--payments', default=2400, show_default=True)
+    @click.option('--seed', default=0, show_default=True)
+    def generate_command(landlords, buildings, payments, seed):
+        """Append a synthetic portfolio, e.g. --landlords 1000 --buildings 200000 --payments 5000000."""
+        generate(landlords, buildings, payments, seed, echo=click.echo)
@@ -0,0 +1,179 @@
+import atexit
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+from flask import current_app, has_app_context
+
+from server.instrumentation import timed
+
+DEFAULT_LOG_ROUNDS = 12
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def log_rounds():
+    return int(_config('BCRYPT_LOG_ROUNDS', DEFAULT_LOG_ROUNDS))
+
+
+def hash_rounds(password_hash):
+    # '$2b$12$...' -> 12
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+class HashingMetrics:
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=window)
+
+    def start(self):
+        with self.lock:
+            self.queued += 1
+        return time.perf_counter()
+
+    def finish(self, started, ok=True):
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.queued -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.latencies.append(elapsed)
+        return elapsed
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            queued, completed, failed = self.queued, self.completed, self.failed
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        return {
+            'queue_depth': queued,
+            'completed': completed,
+            'failed': failed,
+            'workers': _pool.workers if _pool else 0,
+            'latency_ms': {
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': percentile(1.0),
+            },
+        }
+
+
+class HashingPool:
+    # bcrypt is pure CPU; running it in separate processes keeps a burst of
+    # logins from starving request threads that share this interpreter's GIL.
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def run(self, fn, *args):
+        future = self.executor.submit(fn, *args)
+        with self.lock:
+            self.pending.add(future)
+        try:
+            return future.result()
+        finally:
+            with self.lock:
+                self.pending.discard(future)
+
+    def shutdown(self):
+        # shutdown(cancel_futures=True) is 3.9+; cancel the queued hashes ourselves.
+        with self.lock:
+            for future in self.pending:
+                future.cancel()
+        self.executor.shutdown(wait=False)
+
+
+metrics = HashingMetrics()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    workers = int(_config('BCRYPT_WORKERS', 0))
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(workers)
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def _discard(pool):
+    # A worker died (OOM killer, say) and took the executor down with it;
+    # the next _get_pool() builds a fresh one.
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    atexit.unregister(pool.shutdown)
+    pool.shutdown()
+
+
+def _run(fn, *args):
+    pool = _get_pool()
+    started = metrics.start()
+    try:
+        with timed('bcrypt'):
+            if pool is None:
+                result = fn(*args)
+            else:
+                try:
+                    result = pool.run(fn, *args)
+                except BrokenProcessPool:
+                    _discard(pool)
+                    pool = _get_pool()
+                    result = pool.run(fn, *args) if pool else fn(*args)
+    except Exception:
+        metrics.finish(started, ok=False)
+        raise
+    metrics.finish(started)
+    return result
+
+
+def hash_password(password):
+    return _run(_hash, password, log_rounds())
+
+
+def check_password(password_hash, password):
+    return _run(_check, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    return hash_rounds(password_hash) < log_rounds()
@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request, session
+
+HEADER = 'Idempotency-Key'
+# status of a claimed key whose response isn't stored yet
+PENDING = 0
+# seconds a claim holds its key when nothing completes or releases it
+CLAIM_TTL = 300
+
+
+class IdempotencyStore:
+    # Same layout as the session store: SQLite so a replay survives a restart,
+    # with a bounded LRU in front so the usual quick retry is a dict hit.
+    #
+    # A key is claimed by inserting a PENDING row, so two workers retrying the
+    # same key can't both run the handler: the loser finds the row and either
+    # replays it or is told the first is still in progress. A completed row is
+    # never overwritten, so a cached entry can't go stale under another
+    # worker. A pending row expires after CLAIM_TTL, so a worker that died
+    # mid-request doesn't hold its key for the whole TTL.
+
+    def __init__(self, path, cache_size=10000, ttl=86400):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS idempotency_keys ('
+            'key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, status INTEGER NOT NULL, '
+            'body TEXT NOT NULL, session TEXT NOT NULL, expiry REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expiry ON idempotency_keys (expiry)')
+
+    def _remember(self, key, entry):
+        if not self.cache_size:
+            return
+        self.cache[key] = entry
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def get(self, key, now):
+        """(fingerprint, status, body, session updates, expiry), status PENDING while claimed."""
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                row = self.conn.execute(
+                    'SELECT fingerprint, status, body, session, expiry FROM idempotency_keys WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (row[0], row[1], json.loads(row[2]), json.loads(row[3]), row[4])
+                # only completed entries are cached: they never change
+                if entry[1] != PENDING:
+                    self._remember(key, entry)
+            else:
+                self.cache.move_to_end(key)
+        return entry if entry[4] > now else None
+
+    def claim(self, key, fingerprint, now):
+        """True if this caller now owns key; an expired row, pending or not, can be taken over."""
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT INTO idempotency_keys (key, fingerprint, status, body, session, expiry) '
+                "VALUES (?, ?, ?, 'null', '{}', ?) "
+                'ON CONFLICT (key) DO UPDATE SET fingerprint = excluded.fingerprint, status = excluded.status, '
+                'body = excluded.body, session = excluded.session, expiry = excluded.expiry '
+                'WHERE idempotency_keys.expiry <= ?',
+                (key, fingerprint, PENDING, now + CLAIM_TTL, now)
+            )
+            if cursor.rowcount:
+                self.cache.pop(key, None)
+            return cursor.rowcount == 1
+
+    def release(self, key):
+        """Drop a claim that ended without a stored response, so the key can be retried."""
+        with self.lock:
+            self.conn.execute('DELETE FROM idempotency_keys WHERE key = ? AND status = ?', (key, PENDING))
+
+    def set(self, key, fingerprint, status, body, session_updates, now):
+        entry = (fingerprint, status, body, session_updates, now + self.ttl)
+        with self.lock:
+            cursor = self.conn.execute(
+                'UPDATE idempotency_keys SET status = ?, body = ?, session = ?, expiry = ? '
+                'WHERE key = ? AND fingerprint = ? AND status = ?',
+                (status, json.dumps(body), json.dumps(session_updates), entry[4], key, fingerprint, PENDING)
+            )
+            if cursor.rowcount:
+                self._remember(key, entry)
+            self.conn.execute('DELETE FROM idempotency_keys WHERE expiry <= ?', (now,))
+
+
+def _split(result):
+    # flask-restful handlers return data, (data, status) or (data, status, headers)
+    if isinstance(result, tuple):
+        return result[0], result[1] if len(result) > 1 else 200
+    return result, 200
+
+
+def _run(store, key, fingerprint, now, fn, args, kwargs):
+    stored = False
+    try:
+        before = dict(session)
+        result = fn(*args, **kwargs)
+        body, status = _split(result)
+        if status < 500:
+            session_updates = {k: v for k, v in session.items() if before.get(k) != v}
+            store.set(key, fingerprint, status, body, session_updates, now)
+            stored = True
+        return result
+    finally:
+        if not stored:
+            store.release(key)
+
+
+def idempotent(fn):
+    """
+    Replays the stored response for a repeated Idempotency-Key instead of
+    running the handler again. Keys are scoped to the caller and endpoint;
+    reusing one with a different body is rejected, and 5xx responses are not
+    stored so those can be retried for real. Session changes are stored with
+    the response, so a signup or login retried after its response was lost
+    still logs the caller in; the fingerprint covers the body, password
+    included, so only a caller who sent the same credentials gets replayed.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if not client_key:
+            return fn(*args, **kwargs)
+
+        store = current_app.extensions['idempotency']
+        landlord_id = session.get('landlord_id')
+        # Anonymous callers have no account to scope by; their address at
+        # least keeps two clients that pick the same key apart.
+        scope = landlord_id or f'-{request.remote_addr}'
+        key = f"{scope}:{request.method}:{request.path}:{client_key}"
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        now = time.time()
+
+        entry = store.get(key, now)
+        if entry is None and store.claim(key, fingerprint, now):
+            return _run(store, key, fingerprint, now, fn, args, kwargs)
+        if entry is None:
+            # another request claimed the key between the read and the claim
+            entry = store.get(key, now)
+        if entry is not None and entry[0] != fingerprint:
+            return {'error': 'Idempotency-Key was already used with a different request body'}, 422
+        if entry is None or entry[1] == PENDING:
+            return {'error': 'a request with this Idempotency-Key is already in progress'}, 409
+
+        _, status, body, session_updates, _ = entry
+        session.update(session_updates)
+        return body, status, {'Idempotent-Replayed': 'true'}
+
+    return wrapper
+
+
+def init_app(app):
+    app.extensions['idempotency'] = IdempotencyStore(
+        app.config['IDEMPOTENCY_SQLITE_PATH'],
+        app.config.get('IDEMPOTENCY_CACHE_SIZE', 10000),
+        app.config.get('IDEMPOTENCY_TTL', 86400),
+    )
@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+# Upper bounds in ms; the last bucket catches everything slower.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+slow_query_log = logging.getLogger('server.slow_queries')
+
+
+class RequestTiming:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.durations = defaultdict(float)
+
+    def server_timing(self, total):
+        parts = [f'db;dur={self.durations["db"] * 1000:.2f};desc="{self.statements} queries"']
+        parts += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.durations.items() if name != 'db']
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def _current():
+    return g.get('timing') if has_request_context() else None
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block to the current request's Server-Timing
+    entry called name. SQL run inside the block is left out, it is already
+    counted under db.
+    """
+    timing = _current()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    db_before = timing.durations['db']
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timing.durations[name] += elapsed - (timing.durations['db'] - db_before)
+
+
+class RequestMetrics:
+    # Last window requests per endpoint, so the numbers track current
+    # behaviour rather than averaging in everything since boot.
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, endpoint, total, timing):
+        sample = (total, timing.statements, dict(timing.durations))
+        with self.lock:
+            self.samples[endpoint].append(sample)
+
+    def snapshot(self):
+        with self.lock:
+            samples = {endpoint: list(values) for endpoint, values in self.samples.items()}
+
+        def percentile(values, p):
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2)
+
+        result = {}
+        for endpoint, values in sorted(samples.items()):
+            totals = sorted(total for total, _, _ in values)
+            histogram = [0] * (len(BUCKETS_MS) + 1)
+            for total in totals:
+                ms = total * 1000
+                histogram[next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))] += 1
+            phases = defaultdict(float)
+            for _, _, durations in values:
+                for name, seconds in durations.items():
+                    phases[name] += seconds
+            result[endpoint] = {
+                'requests': len(values),
+                'latency_ms': {
+                    'p50': percentile(totals, 0.5),
+                    'p95': percentile(totals, 0.95),
+                    'p99': percentile(totals, 0.99),
+                    'max': percentile(totals, 1.0),
+                },
+                'histogram_ms': {
+                    **{f'<={bound}': count for bound, count in zip(BUCKETS_MS, histogram)},
+                    f'>{BUCKETS_MS[-1]}': histogram[-1],
+                },
+                'statements_avg': round(sum(s for _, s, _ in values) / len(values), 1),
+                'avg_ms': {name: round(seconds / len(values) * 1000, 2) for name, seconds in sorted(phases.items())},
+            }
+        return result
+
+
+metrics = RequestMetrics()
+
+
+def call_site():
+    # Innermost frame in our own code, skipping this module.
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(SERVER_DIR) and frame.filename != __file__:
+            return f'{os.path.relpath(frame.filename, SERVER_DIR)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current() is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_instrumentation_started', None)
+    timing = _current()
+    if started is None or timing is None:
+        return
+    elapsed = time.perf_counter() - started
+    timing.statements += 1
+    timing.durations['db'] += elapsed
+    threshold = g.get('slow_query_ms')
+    if threshold and elapsed * 1000 >= threshold:
+        slow_query_log.warning(
+            '%.1fms %s %s at %s\n%s', elapsed * 1000, request.method, request.path, call_site(), statement
+        )
+
+
+_listening = False
+
+
+def init_app(app):
+    global _listening
+    metrics.window = app.config.get('METRICS_WINDOW', metrics.window)
+    log_path = app.config.get('SLOW_QUERY_LOG')
+    if log_path:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_log.addHandler(handler)
+        slow_query_log.setLevel(logging.WARNING)
+
+    if not _listening:
+        # On the Engine class so the readonly bind and any later engines are covered too.
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+    @app.before_request
+    def start_timing():
+        g.timing = RequestTiming()
+        g.slow_query_ms = app.config.get('SLOW_QUERY_MS', 100)
+
+    @app.after_request
+    def finish_timing(response):
+        timing = g.pop('timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.started
+        response.headers['Server-Timing'] = timing.server_timing(total)
+        metrics.record(request.endpoint or 'unmatched', total, timing)
+        return response
@@ -0,0 +1,55 @@
+import logging
+import threading
+
+from server.extensions import db
+
+log = logging.getLogger(__name__)
+
+
+class PeriodicJob(threading.Thread):
+    # Same shape as the session sweeper: a daemon thread calling job() in an
+    # app context every interval seconds, once straight away.
+
+    def __init__(self, app, name, interval, job):
+        super().__init__(name=name, daemon=True)
+        self.app = app
+        self.interval = interval
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run_once(self):
+        with self.app.app_context():
+            try:
+                self.job()
+            except Exception:
+                db.session.rollback()
+                log.exception('%s failed', self.name)
+            finally:
+                db.session.remove()
+
+    def run(self):
+        self.run_once()
+        while not self.stopped.wait(self.interval):
+            self.run_once()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def schedule(app, name, interval_key, default, job):
+    """
+    Run job every app.config[interval_key] seconds (0 disables it) from the
+    first request on, so CLI commands and migrations never start the thread.
+    The running job is app.extensions[name].
+    """
+    lock = threading.Lock()
+
+    @app.before_request
+    def start_job():
+        interval = app.config.get(interval_key, default)
+        if name in app.extensions or not interval:
+            return
+        with lock:
+            if name not in app.extensions:
+                app.extensions[name] = PeriodicJob(app, name, interval, job)
+                app.extensions[name].start()
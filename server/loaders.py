@@ -0,0 +1,63 @@
+from marshmallow import class_registry, fields
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import selectinload
+
+from server import serializers, stats
+from server.instrumentation import timed
+from server.extensions import db
+from server.models import Landlord
+from server.schemas import LandlordSchema
+
+
+def nested_schema(field):
+    nested = field.nested
+    if isinstance(nested, str):
+        nested = class_registry.get_class(nested)
+    return nested
+
+
+def eager_options(schema_cls, model, only=None, skip=()):
+    # Walk the Nested fields the schema will actually dump (honouring only=)
+    # and emit one selectinload per relationship, so the dump never lazy loads.
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in schema_cls._declared_fields.items():
+        if not isinstance(field, fields.Nested) or field.load_only:
+            continue
+        if (only is not None and name not in only) or name in skip:
+            continue
+        attr = field.attribute or name
+        if attr not in relationships:
+            continue
+        relationship = relationships[attr]
+        loader = selectinload(getattr(model, attr))
+        children = eager_options(nested_schema(field), relationship.mapper.class_, field.only, skip)
+        options.append(loader.options(*children) if children else loader)
+    return options
+
+
+def load_landlord(landlord_id):
+    return db.session.execute(
+        select(Landlord)
+        .where(Landlord.id == landlord_id)
+        .options(*eager_options(LandlordSchema, Landlord))
+    ).scalar_one_or_none()
+
+
+def landlord_summary(landlord):
+    # landlord_stats is kept on write, so this is one primary-key read.
+    counts = stats.for_landlord(landlord.id)
+    return {
+        'id': landlord.id,
+        'username': landlord.username,
+        'counts': {key: counts[key] for key in ('tenants', 'rental_buildings', 'payments', 'property_types')},
+    }
+
+
+def dump_landlord(landlord_id, view=None):
+    # view='summary' skips the graph entirely: one row for the landlord, one for the counts.
+    with timed('serialize'):
+        if view == 'summary':
+            landlord = db.session.get(Landlord, landlord_id)
+            return landlord_summary(landlord) if landlord else None
+        return serializers.dump_landlord(landlord_id)
@@ -1,13 +1,28 @@
-from server.extensions import db, bcrypt,ma  # Use db from extensions.py
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, auto_field
+from server.extensions import db, bcrypt  # Use db from extensions.py
+from server import hashing
 from sqlalchemy.orm import validates, relationship
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import DDL, event, func
 from werkzeug.security import generate_password_hash, check_password_hash
-from marshmallow import fields
-from flask_marshmallow import Marshmallow
 from datetime import date
 import re
 
 
+PERIOD_PATTERN = re.compile(r'^(0[1-9]|1[0-2])-(\d{4})$')
+
+def period_to_month(payment_period):
+    # '02-2024' -> 202402, which sorts and range-scans as an integer
+    match = PERIOD_PATTERN.match(payment_period) if isinstance(payment_period, str) else None
+    if not match:
+        raise ValueError('payment_period must match MM-YYYY format')
+    return int(match.group(2)) * 100 + int(match.group(1))
+
+def month_to_period(period_month):
+    if period_month is None:
+        return None
+    return f'{period_month % 100:02d}-{period_month // 100:04d}'
+
+
 class Landlord(db.Model):
 
     __tablename__ = 'landlords'
@@ -17,14 +32,19 @@ class Landlord(db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(100), nullable=False)
 
-    tenants = db.relationship('Tenant', back_populates='landlord',  cascade='all, delete-orphan')
+    tenants = db.relationship('Tenant', back_populates='landlord',  cascade='all, delete-orphan', order_by='Tenant.id')
     
-    rental_buildings = db.relationship('RentalBuilding', back_populates='landlord',  cascade='all, delete-orphan')
-
-    property_types = db.relationship('PropertyType', secondary='landlord_property_type', back_populates='landlords')
+    rental_buildings = db.relationship('RentalBuilding', back_populates='landlord',  cascade='all, delete-orphan', order_by='RentalBuilding.id')
+
+    # ordered on the association's own column, which its (landlord_id,
+    # property_type_id) primary key already returns in order
+    property_types = db.relationship(
+        'PropertyType', secondary='landlord_property_type', back_populates='landlords',
+        order_by='landlord_property_type.c.property_type_id'
+    )
     
     def property_by_name(self, type_name):
-        return [b for b in self.rental_buildings if b.property_type.property_type_name == type_name]
+        return db.session.scalars(buildings_by_property_type(self.id, type_name)).all()
     @validates('username')
     def validate_username(self, key, username):
         if not username or not isinstance(username, str):
@@ -45,12 +65,19 @@ class Landlord(db.Model):
         if not pattern.match(password):
             raise ValueError('password must be at least 6 characters and include at least an upper case and a symbol(!@#$%^&*)')
         
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = hashing.hash_password(password)
     
     def check_password(self, password):
-        result = bcrypt.check_password_hash(self.password_hash, password)
+        result = hashing.check_password(self.password_hash, password)
         return result
 
+    def rehash_password(self, password):
+        # call only after check_password succeeded; upgrades hashes made with a lower cost factor
+        if not hashing.needs_rehash(self.password_hash):
+            return False
+        self.password_hash = hashing.hash_password(password)
+        return True
+
 class Tenant(db.Model):
 
     __tablename__ = 'tenants'
@@ -61,7 +88,7 @@ class Tenant(db.Model):
     last_name = db.Column(db.String(50), nullable=False)
     telephone = db.Column(db.String(12), nullable=False)
     occupation = db.Column(db.String(50), nullable=False)
-    landlord_id = db.Column(db.Integer, db.ForeignKey('landlords.id'))
+    landlord_id = db.Column(db.Integer, db.ForeignKey('landlords.id'), index=True)
 
     landlord = db.relationship('Landlord', back_populates='tenants')
     rental_buildings = db.relationship('RentalBuilding', back_populates='tenant' )
@@ -97,18 +124,44 @@ class Tenant(db.Model):
         return telephone
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_rental_building_id_due_date', 'rental_building_id', 'due_date'),
+        db.Index('ix_payments_rental_building_id_period_month', 'rental_building_id', 'period_month'),
+        db.Index('ix_payments_landlord_id_due_date', 'landlord_id', 'due_date'),
+        db.Index('ix_payments_landlord_id_rental_building_id', 'landlord_id', 'rental_building_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, nullable=False)
     monthly_price = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Integer, nullable=False)
     payment_status = db.Column(db.Boolean, nullable=False)
     payment_date = db.Column(db.Date, nullable=False)
-    due_date = db.Column(db.Date, nullable=False)
-    payment_period = db.Column(db.String(7), nullable=False)
+    due_date = db.Column(db.Date, nullable=False, index=True)
+    period_month = db.Column(db.Integer, nullable=False, index=True)
     rental_building_id = db.Column(db.Integer, db.ForeignKey('rental_buildings.id'))
+    # copy of rental_buildings.landlord_id, kept by PAYMENT_LANDLORD_TRIGGERS
+    landlord_id = db.Column(db.Integer)
 
     rental_building = db.relationship('RentalBuilding', back_populates='payments')
 
+    @hybrid_property
+    def payment_period(self):
+        return month_to_period(self.period_month)
+
+    @payment_period.setter
+    def payment_period(self, payment_period):
+        self.period_month = period_to_month(payment_period)
+
+    @payment_period.expression
+    def payment_period(cls):
+        return func.printf('%02d-%04d', cls.period_month % 100, cls.period_month // 100)
+
+    @validates('period_month')
+    def validate_period_month(self, key, period_month):
+        if not isinstance(period_month, int) or not 1 <= period_month % 100 <= 12:
+            raise ValueError('period_month must be a YYYYMM integer')
+        return period_month
+
     @validates('price')
     def validate_price(self, key, price):
         if not price or not isinstance(price, int):
@@ -121,27 +174,51 @@ class Payment(db.Model):
         if payment_status is None or not isinstance(payment_status, bool):
             raise ValueError('payment_status is required and must be a status')
         return payment_status
-    
+
+
+# A landlord's payments carry the landlord_id of their building, so listing
+# them by due date is one range over (landlord_id, due_date) that stops after
+# a page, instead of a join through rental_buildings and a sort. Writers may
+# set it themselves; the triggers fill it in or correct it whenever a payment
+# is written or a building changes hands, Core inserts included.
+_BUILDING_LANDLORD = '(SELECT landlord_id FROM rental_buildings WHERE id = new.rental_building_id)'
+_SET_LANDLORD = f'UPDATE payments SET landlord_id = {_BUILDING_LANDLORD} WHERE id = new.id;'
+PAYMENT_LANDLORD_TRIGGERS = [
+    f'CREATE TRIGGER payments_landlord_ai AFTER INSERT ON payments '
+    f'WHEN new.landlord_id IS NOT {_BUILDING_LANDLORD} BEGIN {_SET_LANDLORD} END',
+    f'CREATE TRIGGER payments_landlord_au AFTER UPDATE OF rental_building_id, landlord_id ON payments '
+    f'WHEN new.landlord_id IS NOT {_BUILDING_LANDLORD} BEGIN {_SET_LANDLORD} END',
+    'CREATE TRIGGER payments_landlord_buildings_au AFTER UPDATE OF landlord_id ON rental_buildings '
+    'BEGIN UPDATE payments SET landlord_id = new.landlord_id WHERE rental_building_id = new.id; END',
+]
+
+for _statement in PAYMENT_LANDLORD_TRIGGERS:
+    event.listen(Payment.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
 
 
 class RentalBuilding(db.Model):
 
     __tablename__ = 'rental_buildings'
+    __table_args__ = (
+        db.Index('ix_rental_buildings_landlord_id_property_type_id', 'landlord_id', 'property_type_id'),
+        db.Index('ix_rental_buildings_landlord_id_starting_date', 'landlord_id', 'starting_date'),
+        db.Index('ix_rental_buildings_landlord_id_ending_date', 'landlord_id', 'ending_date'),
+    )
     
     id = db.Column(db.Integer, nullable=False, primary_key=True)
  
     address = db.Column(db.String(200), nullable=False, unique=True)
     starting_date = db.Column(db.Date, nullable=False)
     ending_date = db.Column(db.Date, nullable=False)
-    landlord_id = db.Column(db.Integer, db.ForeignKey('landlords.id'))
-    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'))
-    property_type_id = db.Column(db.Integer, db.ForeignKey('property_types.id'))
+    landlord_id = db.Column(db.Integer, db.ForeignKey('landlords.id'), index=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), index=True)
+    property_type_id = db.Column(db.Integer, db.ForeignKey('property_types.id'), index=True)
 
     landlord = db.relationship('Landlord', back_populates='rental_buildings')
     tenant = db.relationship('Tenant', back_populates='rental_buildings' )
     property_type = db.relationship('PropertyType', back_populates='rental_buildings')
 
-    payments = db.relationship('Payment', back_populates='rental_building', cascade=('all, delete-orphan'))
+    payments = db.relationship('Payment', back_populates='rental_building', cascade=('all, delete-orphan'), order_by='Payment.id')
 
     @validates('address')
     def validate_address(self, key, address):
@@ -170,7 +247,7 @@ class PropertyType(db.Model):
     __tablename__ = 'property_types'
     
     id = db.Column(db.Integer, nullable=False, primary_key=True)
-    property_type_name = db.Column(db.String(50), nullable=False)
+    property_type_name = db.Column(db.String(50), nullable=False, index=True)
     
     rental_buildings = db.relationship('RentalBuilding', back_populates='property_type')
 
@@ -184,89 +261,82 @@ class PropertyType(db.Model):
             raise ValueError('property_type_name must be between 3 and 50 characters')
         return property_type_name
 
+class OverduePayment(db.Model):
+    # Written by server/overdue.py and the payments triggers, never by resources.
+    __tablename__ = 'overdue_payments'
+    __table_args__ = (
+        db.Index('ix_overdue_payments_landlord_id_due_date', 'landlord_id', 'due_date', 'payment_id'),
+    )
+
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.id'), primary_key=True)
+    landlord_id = db.Column(db.Integer, db.ForeignKey('landlords.id'), nullable=False)
+    rental_building_id = db.Column(db.Integer, db.ForeignKey('rental_buildings.id'), nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    amount_due = db.Column(db.Integer, nullable=False)
+
+
+class Watermark(db.Model):
+    # How far a background job has got, e.g. overdue detection up to (not
+    # including) value, or the change-log sequence compacted up to position.
+    __tablename__ = 'watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Date)
+    position = db.Column(db.Integer)
+
+
+class LandlordStats(db.Model):
+    # Kept current by the triggers in server/stats.py; flask landlord-stats verify checks for drift.
+    __tablename__ = 'landlord_stats'
+
+    landlord_id = db.Column(db.Integer, db.ForeignKey('landlords.id'), primary_key=True)
+    tenants = db.Column(db.Integer, nullable=False, default=0)
+    rental_buildings = db.Column(db.Integer, nullable=False, default=0)
+    property_types = db.Column(db.Integer, nullable=False, default=0)
+    payments = db.Column(db.Integer, nullable=False, default=0)
+    unpaid_payments = db.Column(db.Integer, nullable=False, default=0)
+    outstanding = db.Column(db.Integer, nullable=False, default=0)
+    # bumped by any write to the landlord's data; the /check_session ETag and cache key
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+
+class Change(db.Model):
+    # Append-only; written by server/changefeed.py, never by resources.
+    __tablename__ = 'changes'
+    __table_args__ = (
+        db.Index('ix_changes_landlord_id_seq', 'landlord_id', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
+
+    seq = db.Column(db.Integer, primary_key=True)
+    landlord_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(30), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.Integer, nullable=False)
+
+
+def buildings_by_property_type(landlord_id, type_name):
+    # seeks the (landlord_id, property_type_id) index instead of walking rental_buildings
+    type_ids = db.select(PropertyType.id).where(PropertyType.property_type_name == type_name)
+    return (
+        db.select(RentalBuilding)
+        .where(RentalBuilding.landlord_id == landlord_id, RentalBuilding.property_type_id.in_(type_ids))
+        .order_by(RentalBuilding.id)
+    )
+
+def property_type_counts(landlord_id):
+    return (
+        db.select(PropertyType.id, PropertyType.property_type_name, func.count(RentalBuilding.id))
+        .join(RentalBuilding, RentalBuilding.property_type_id == PropertyType.id)
+        .where(RentalBuilding.landlord_id == landlord_id)
+        .group_by(PropertyType.id)
+        .order_by(PropertyType.id)
+    )
+
 landlord_property_type = db.Table(
     'landlord_property_type', 
     db.Column('landlord_id',db.Integer, db.ForeignKey('landlords.id'), primary_key=True),
-    db.Column('property_type_id', db.Integer, db.ForeignKey('property_types.id'), primary_key=True)
+    db.Column('property_type_id', db.Integer, db.ForeignKey('property_types.id'), primary_key=True),
+    db.Index('ix_landlord_property_type_property_type_id', 'property_type_id')
 )
-
-class LandlordSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Landlord
-        load_instance = True
-        include_relationship = True
-        exclude = ('password_hash',)
-
-    id = ma.auto_field()
-    username = ma.auto_field()
-    password = fields.String(load_only=True)
-
-    tenants = ma.Nested('TenantSchema', many=True, only=('id', 'first_name', 'last_name', 'telephone', 'occupation', 'landlord_id'))
-    rental_buildings = ma.Nested('RentalBuildingSchema', many=True, only=('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id', 'payments'))
-    property_types = ma.Nested('PropertyTypeSchema', many=True, only=('id', 'property_type_name'))
-
-
-class TenantSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Tenant
-        include_relationship = True
-        load_instance = True
-
-    id = ma.auto_field()
-    first_name = ma.auto_field()
-    last_name = ma.auto_field()
-    occupation = ma.auto_field()
-    landlord_id = ma.auto_field()
-
-    landlord = ma.Nested('LandlordSchema', only=('id','username'))
-    rental_buildings = ma.Nested('RentalBuildingSchema', many=True, only=('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id', 'tenant'))
-
-
-class RentalBuildingSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = RentalBuilding
-        include_relationship = True
-        load_instance = True
-
-    id = ma.auto_field()
-    address = ma.auto_field()
-    starting_date = ma.Date(format='%Y-%m-%d')
-    ending_date = ma.Date(format='%Y-%m-%d')
-    landlord_id = ma.auto_field()
-    tenant_id = ma.auto_field()
-    property_type_id = ma.auto_field()
-
-    landlord = ma.Nested('LandlordSchema', only=('id', 'username'))
-    tenant = ma.Nested('TenantSchema', only=('id', 'first_name', 'last_name', 'telephone', 'occupation', 'landlord_id'))
-    property_type = ma.Nested('PropertyTypeSchema', only=('id','property_type_name'))
-    payments = ma.Nested('PaymentSchema', many=True)
-
-class PropertyTypeSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = PropertyType
-        load_instance = True
-        include_relationship = True
-
-    id = ma.auto_field()
-    property_type_name = ma.auto_field()
-
-    rental_buildings = ma.Nested('RentalBuildingSchema', many=True, only=('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id'))
-    landlords = ma.Nested('LandlordSchema', many=True, only=('id', 'username'))
-
-
-class PaymentSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Payment
-        load_instance = True
-        include_relationship = True
-
-    id = ma.auto_field()
-    monthly_price = ma.auto_field()
-    price = ma.auto_field()
-    payment_status = ma.auto_field()
-    payment_date = ma.Date(format='%Y-%m-%d')
-    due_date = ma.Date(format='%Y-%m-%d')
-    payment_period = ma.auto_field()
-    rental_building_id = ma.auto_field()
-
-   
\ No newline at end of file
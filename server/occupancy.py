@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+from sqlalchemy import or_, select
+
+from server.models import RentalBuilding
+
+EXPIRING_DAYS = 30
+
+# overlapping and expiring are a range on the (landlord_id, ending_date)
+# index, ordered the way that index already returns rows so a page stops
+# after limit rows instead of sorting every match. Vacancy is the complement
+# of overlap, an OR of two ranges: answering it from both date indexes would
+# mean sorting the union, so it pages by id instead, walking the landlord's
+# buildings in id order off ix_rental_buildings_landlord_id and filtering,
+# which still stops once a page is full.
+
+
+def overlapping(landlord_id, window_from, window_to):
+    # leases active at any point in [window_from, window_to]
+    query = select(RentalBuilding).where(
+        RentalBuilding.landlord_id == landlord_id,
+        RentalBuilding.ending_date >= window_from,
+        RentalBuilding.starting_date <= window_to,
+    )
+    return query, (RentalBuilding.ending_date, RentalBuilding.id), (date, int)
+
+
+def expiring(landlord_id, window_from, window_to):
+    query = select(RentalBuilding).where(
+        RentalBuilding.landlord_id == landlord_id,
+        RentalBuilding.ending_date >= window_from,
+        RentalBuilding.ending_date <= window_to,
+    )
+    return query, (RentalBuilding.ending_date, RentalBuilding.id), (date, int)
+
+
+def vacant(landlord_id, window_from, window_to):
+    # no lease at any point in the window: ended before it or starts after it
+    query = select(RentalBuilding).where(
+        RentalBuilding.landlord_id == landlord_id,
+        or_(RentalBuilding.ending_date < window_from, RentalBuilding.starting_date > window_to),
+    )
+    return query, (RentalBuilding.id,), (int,)
+
+
+QUERIES = {
+    'overlapping': overlapping,
+    'expiring': expiring,
+    'vacant': vacant,
+}
+
+
+def window(window_from=None, window_to=None, today=None):
+    """Defaults to the next EXPIRING_DAYS days from today."""
+    window_from = window_from or today or date.today()
+    window_to = window_to or window_from + timedelta(days=EXPIRING_DAYS)
+    if window_to < window_from:
+        raise ValueError('to must be on or after from')
+    return window_from, window_to
+
+
+def occupancy_query(kind, landlord_id, window_from, window_to, property_type_id=None):
+    """(query, keyset columns, cursor types) for paginate()."""
+    query, columns, types = QUERIES[kind](landlord_id, window_from, window_to)
+    if property_type_id:
+        query = query.where(RentalBuilding.property_type_id == property_type_id)
+    return query, columns, types
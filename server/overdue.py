@@ -0,0 +1,109 @@
+import logging
+from datetime import date
+
+import click
+from sqlalchemy import DDL, event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from server import jobs
+from server.extensions import db
+from server.models import OverduePayment, Payment, RentalBuilding, Watermark
+
+WATERMARK = 'overdue_payments'
+
+log = logging.getLogger(__name__)
+
+# The detector only looks at payments whose due date crossed since its last
+# run. Anything that changes behind the watermark (a payment marked paid, a
+# backdated row from an import, a delete) is handled by these triggers, so
+# they cover Core inserts as well as the ORM.
+_ROW = (
+    'INSERT INTO overdue_payments (payment_id, landlord_id, rental_building_id, due_date, amount_due) '
+    'SELECT new.id, rental_buildings.landlord_id, new.rental_building_id, new.due_date, new.monthly_price '
+    'FROM rental_buildings WHERE rental_buildings.id = new.rental_building_id '
+    'AND rental_buildings.landlord_id IS NOT NULL AND NOT new.payment_status '
+    f"AND new.due_date < (SELECT value FROM watermarks WHERE name = '{WATERMARK}');"
+)
+# a building changing hands takes its overdue payments with it; a building
+# left without a landlord has none
+_BUILDING_ROWS = (
+    'INSERT INTO overdue_payments (payment_id, landlord_id, rental_building_id, due_date, amount_due) '
+    'SELECT id, new.landlord_id, new.id, due_date, monthly_price FROM payments '
+    'WHERE rental_building_id = new.id AND new.landlord_id IS NOT NULL AND NOT payment_status '
+    f"AND due_date < (SELECT value FROM watermarks WHERE name = '{WATERMARK}');"
+)
+TRIGGERS = [
+    f'CREATE TRIGGER overdue_payments_ai AFTER INSERT ON payments BEGIN {_ROW} END',
+    'CREATE TRIGGER overdue_payments_au AFTER UPDATE OF payment_status, due_date, monthly_price, rental_building_id '
+    f'ON payments BEGIN DELETE FROM overdue_payments WHERE payment_id = old.id; {_ROW} END',
+    'CREATE TRIGGER overdue_payments_ad AFTER DELETE ON payments '
+    'BEGIN DELETE FROM overdue_payments WHERE payment_id = old.id; END',
+    'CREATE TRIGGER overdue_payments_buildings_au AFTER UPDATE OF landlord_id ON rental_buildings '
+    'WHEN new.landlord_id IS NOT old.landlord_id BEGIN '
+    'DELETE FROM overdue_payments WHERE payment_id IN (SELECT id FROM payments WHERE rental_building_id = new.id); '
+    f'{_BUILDING_ROWS} END',
+]
+
+for _statement in TRIGGERS:
+    event.listen(OverduePayment.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+def watermark():
+    row = db.session.get(Watermark, WATERMARK)
+    return row.value if row else None
+
+
+def detect(today=None):
+    """
+    Record unpaid payments that fell due in [watermark, today) and move the
+    watermark to today. The first run has no watermark and examines every
+    payment due before today; later runs only the days in between.
+    """
+    today = today or date.today()
+    since = watermark()
+    if since is not None and since >= today:
+        return 0
+
+    query = (
+        select(Payment.id, RentalBuilding.landlord_id, Payment.rental_building_id, Payment.due_date, Payment.monthly_price)
+        .join(RentalBuilding, Payment.rental_building_id == RentalBuilding.id)
+        .where(Payment.due_date < today, Payment.payment_status.is_(False), RentalBuilding.landlord_id.isnot(None))
+    )
+    if since is not None:
+        query = query.where(Payment.due_date >= since)
+
+    result = db.session.execute(
+        sqlite_insert(OverduePayment)
+        .from_select(['payment_id', 'landlord_id', 'rental_building_id', 'due_date', 'amount_due'], query)
+        .on_conflict_do_nothing()
+    )
+    db.session.execute(
+        sqlite_insert(Watermark)
+        .values(name=WATERMARK, value=today)
+        .on_conflict_do_update(index_elements=['name'], set_={'value': today})
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def overdue_query(landlord_id):
+    return select(OverduePayment).where(OverduePayment.landlord_id == landlord_id)
+
+
+def _detect_job():
+    found = detect()
+    if found:
+        log.info('%d payments became overdue', found)
+
+
+def init_app(app):
+    jobs.schedule(app, 'overdue', 'OVERDUE_INTERVAL', 3600, _detect_job)
+
+
+def register(app):
+    @app.cli.command('detect-overdue')
+    @click.option('--today', type=click.DateTime(formats=['%Y-%m-%d']), help='Treat this date as today.')
+    def detect_overdue_command(today):
+        """Run one incremental overdue-payment detection pass."""
+        found = detect(today.date() if today else None)
+        click.echo(f'{found} payments became overdue, watermark {watermark()}')
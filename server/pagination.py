@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+from server.extensions import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    # types mirrors the keyset columns, e.g. (date, int) for (due_date, id)
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise CursorError('invalid cursor')
+        return [datetime.strptime(v, '%Y-%m-%d').date() if t is date else t(v) for v, t in zip(values, types)]
+    except (ValueError, TypeError) as e:
+        raise CursorError('invalid cursor') from e
+
+
+def parse_limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except (ValueError, TypeError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_LIMIT)
+
+
+def parse_date(value, name):
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        raise ValueError(f'{name} must be a valid date in YYYY-MM-DD format.')
+
+
+def after(columns, values):
+    # (a, b) > (x, y) spelled out so SQLite can seek on a composite index
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal, column > value))
+    return or_(*clauses)
+
+
+def paginate(query, columns, types, cursor, limit):
+    if cursor:
+        query = query.where(after(columns, decode_cursor(cursor, types)))
+    rows = db.session.scalars(query.order_by(*columns).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows, next_cursor
@@ -0,0 +1,116 @@
+from sqlalchemy import case, func, select
+
+from server.extensions import db
+from server.models import Payment, RentalBuilding, Tenant, month_to_period
+
+# What a payment row actually brought in: its price once it's marked paid.
+collected = func.sum(case((Payment.payment_status.is_(True), Payment.price), else_=0))
+expected = func.sum(Payment.monthly_price)
+outstanding = func.sum(
+    case(
+        (Payment.payment_status.is_(False), Payment.monthly_price),
+        (Payment.price < Payment.monthly_price, Payment.monthly_price - Payment.price),
+        else_=0,
+    )
+)
+late = func.sum(case((Payment.payment_date > Payment.due_date, 1), else_=0))
+
+
+def _landlord_payments(columns, landlord_id, period_from=None, period_to=None):
+    query = (
+        select(*columns)
+        .select_from(Payment)
+        .join(RentalBuilding, Payment.rental_building_id == RentalBuilding.id)
+        .where(RentalBuilding.landlord_id == landlord_id)
+    )
+    if period_from:
+        query = query.where(Payment.period_month >= period_from)
+    if period_to:
+        query = query.where(Payment.period_month <= period_to)
+    return query
+
+
+def rent_roll(landlord_id, period_from=None, period_to=None):
+    query = (
+        _landlord_payments(
+            (Payment.period_month, func.count(Payment.id), expected, collected, outstanding),
+            landlord_id, period_from, period_to
+        )
+        .group_by(Payment.period_month)
+        .order_by(Payment.period_month)
+    )
+    return [
+        {
+            'payment_period': month_to_period(period_month),
+            'payments': count,
+            'expected': expected_total,
+            'collected': collected_total,
+            'outstanding': outstanding_total,
+        }
+        for period_month, count, expected_total, collected_total, outstanding_total in db.session.execute(query)
+    ]
+
+
+def arrears_by_tenant(landlord_id, period_from=None, period_to=None):
+    query = (
+        _landlord_payments(
+            (Tenant.id, Tenant.first_name, Tenant.last_name, func.count(Payment.id), outstanding),
+            landlord_id, period_from, period_to
+        )
+        .join(Tenant, RentalBuilding.tenant_id == Tenant.id)
+        .group_by(Tenant.id)
+        .having(outstanding > 0)
+        .order_by(outstanding.desc(), Tenant.id)
+    )
+    return [
+        {
+            'tenant_id': tenant_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'payments': count,
+            'outstanding': outstanding_total,
+        }
+        for tenant_id, first_name, last_name, count, outstanding_total in db.session.execute(query)
+    ]
+
+
+def late_payments(landlord_id, period_from=None, period_to=None):
+    query = (
+        _landlord_payments(
+            (RentalBuilding.id, RentalBuilding.tenant_id, func.count(Payment.id), late),
+            landlord_id, period_from, period_to
+        )
+        .group_by(RentalBuilding.id)
+        .having(late > 0)
+        .order_by(late.desc(), RentalBuilding.id)
+    )
+    return [
+        {
+            'rental_building_id': rental_building_id,
+            'tenant_id': tenant_id,
+            'payments': count,
+            'late_payments': late_count,
+        }
+        for rental_building_id, tenant_id, count, late_count in db.session.execute(query)
+    ]
+
+
+def collections_by_building(landlord_id, period_from=None, period_to=None):
+    query = (
+        _landlord_payments(
+            (RentalBuilding.id, RentalBuilding.address, func.count(Payment.id), expected, collected),
+            landlord_id, period_from, period_to
+        )
+        .group_by(RentalBuilding.id)
+        .order_by(RentalBuilding.id)
+    )
+    return [
+        {
+            'rental_building_id': rental_building_id,
+            'address': address,
+            'payments': count,
+            'expected': expected_total,
+            'collected': collected_total,
+        }
+        for rental_building_id, address, count, expected_total, collected_total in db.session.execute(query)
+    ]
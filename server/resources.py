@@ -0,0 +1,543 @@
+from flask import current_app, request, make_response, session, Response, stream_with_context
+from flask_restful import Resource
+from datetime import datetime, date
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import io
+import csv
+import re
+
+from server.extensions import db
+from server.models import Landlord, Tenant, RentalBuilding, Payment, OverduePayment, period_to_month, buildings_by_property_type, property_type_counts
+from server.schemas import RentalBuildingSchema, TenantSchema, PaymentSchema, OverduePaymentSchema
+from server.loaders import dump_landlord
+from server.pagination import CursorError, paginate, parse_limit, parse_date
+from server import batch, reports, bulk_import, hashing, versioning, export, idempotency, instrumentation, search, overdue, occupancy, billing, changefeed, stats
+
+# Imported on the first request that routes here (see RESOURCES in
+# server.app), not when the app is built.
+
+
+class CheckSession(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+        view = request.args.get('view')
+        current = versioning.version(landlord_id)
+        if current is None:
+            # no landlord_stats row to version by, so nothing to cache or tag
+            landlord_data = dump_landlord(landlord_id, view)
+            if not landlord_data:
+                return {'error': 'landlord not found'}, 404
+            return landlord_data, 200, {'Cache-Control': 'no-cache'}
+
+        etag = versioning.etag(landlord_id, current, view)
+        # weak match: a compressed 200 carries the same tag as W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        landlord_data = versioning.cached_payload(landlord_id, view, current, lambda: dump_landlord(landlord_id, view))
+        if not landlord_data:
+            return {'error': 'landlord not found'}, 404
+        return landlord_data, 200, {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+        
+        
+class Login(Resource):
+    def post(self):
+        
+        data = request.get_json()
+        username = data.get('username')
+        password = data.get('password')
+
+        if not all([username, password]):
+            return {'error': 'all the fiels are required'}, 400
+        
+        landlord = Landlord.query.filter(Landlord.username == username).first()
+        if not landlord or not landlord.check_password(password):
+            return {'error': "username or password doesn't match"}, 400
+        if landlord.rehash_password(password):
+            db.session.commit()
+        
+        session['landlord_id'] = landlord.id
+        session.permanent = True
+
+        landlord_data = dump_landlord(landlord.id, request.args.get('view'))
+        return landlord_data, 200
+
+class Signup(Resource):
+    method_decorators = [idempotency.idempotent]
+
+    def post(self):
+
+        data = request.get_json()
+        username = data.get('username')
+        password = data.get('password')
+        confirmed_password = data.get('confirmed_password')
+
+        pattern = re.compile(r'^(?=.*[A-Z])(?=.*[!@#$%^&*]).{6,}$')
+
+        if not username or not isinstance(username, str):
+            return {'error': 'username is required and must be a string'}, 400
+        if len(username) < 3 or len(username) > 50:
+            return {'error': 'username must be between 3 and 50 characters'}, 400
+        
+        if not password or not isinstance(password, str):
+            return {'error': 'password is required and must be a string'}, 400
+        if len(password) < 6 or len(password) > 100:
+            return {'error': 'password must be between 6 and 100 characters'}, 400
+        if not pattern.match(password):
+            return {'error': 'password must be at least 6 characters and include at least an upper case and a symbol(!@#$%^&*)'}
+        
+        if not confirmed_password or not isinstance(confirmed_password, str):
+            return {'error': 'confirmed_password is required and must be a string'}, 400
+        if password != confirmed_password:
+            return {'error': "password doesn't match"}, 400
+        
+        # checked before hashing so a taken username doesn't cost a bcrypt round
+        if db.session.scalar(select(Landlord.id).where(Landlord.username == username)) is not None:
+            return {'error': 'username already exists'}, 400
+
+        # new_landlord = Landlord()
+        # new_landlord.username = username
+        # new_landlord.password = password
+        new_landlord = Landlord(username=username, password=password)
+
+        # still ON CONFLICT DO NOTHING on the username unique constraint: the
+        # check above can race a concurrent signup
+        landlord_id = db.session.execute(
+            sqlite_insert(Landlord)
+            .values(username=new_landlord.username, password_hash=new_landlord.password_hash)
+            .on_conflict_do_nothing(index_elements=['username'])
+            .returning(Landlord.id)
+        ).scalar()
+        if landlord_id is None:
+            db.session.rollback()
+            return {'error': 'username already exists'}, 400
+        changefeed.record(landlord_id, Landlord, landlord_id)
+        db.session.commit()
+
+        session['landlord_id'] = landlord_id
+        session.permanent = True
+
+        return dump_landlord(landlord_id), 201
+
+
+class NewRentalBuilding(Resource):
+    method_decorators = [idempotency.idempotent]
+
+    def post(self):
+
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+        landlord = Landlord.query.filter(Landlord.id == landlord_id).first()
+        if not landlord:
+            return {'error': 'landlord not found'}, 404
+        data = request.get_json()
+        address = data.get('address')
+        starting_date = data.get('starting_date')
+        ending_date = data.get('ending_date')
+        # landlord_id = data.get('landlord_id')
+        tenant_id = data.get('tenant_id')
+        property_type_id = data.get('property_type_id')
+
+        if not address or not isinstance(address, str):
+            return {'error': 'address is required and must be a string'}, 400
+        if len(address) < 3 or len(address) > 200:
+            return {'error':'address must be between 3 and 200 characters'}, 400
+        
+        try:
+            starting_date = datetime.strptime(starting_date, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            return {'error': 'starting_date must be a valid date in YYYY-MM-DD format.'}, 400
+        try:
+            ending_date = datetime.strptime(ending_date, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            return {'error': 'ending_date must be a valid date in YYYY-MM-DD format.'}, 400
+        
+        try:
+            new_rental_building = RentalBuilding(
+                address = address,
+                starting_date = starting_date,
+                ending_date = ending_date,
+                landlord_id = landlord_id,
+                tenant_id = tenant_id,
+                property_type_id = property_type_id
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        rental_building_id = db.session.execute(
+            sqlite_insert(RentalBuilding)
+            .values(
+                address=new_rental_building.address,
+                starting_date=new_rental_building.starting_date,
+                ending_date=new_rental_building.ending_date,
+                landlord_id=landlord_id,
+                tenant_id=tenant_id,
+                property_type_id=property_type_id
+            )
+            .on_conflict_do_nothing(index_elements=['address'])
+            .returning(RentalBuilding.id)
+        ).scalar()
+        if rental_building_id is None:
+            db.session.rollback()
+            return {'error': 'A rental building with this address already exists'}, 400
+        changefeed.record(landlord_id, RentalBuilding, rental_building_id)
+        db.session.commit()
+
+        rental_building = db.session.get(RentalBuilding, rental_building_id)
+        with instrumentation.timed('serialize'):
+            return RentalBuildingSchema().dump(rental_building), 201
+
+        
+
+RENTAL_BUILDING_FIELDS = ('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id')
+TENANT_FIELDS = ('id', 'first_name', 'last_name', 'telephone', 'occupation', 'landlord_id')
+
+
+class RentalBuildingList(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            starting_from = parse_date(request.args.get('starting_from'), 'starting_from')
+            starting_to = parse_date(request.args.get('starting_to'), 'starting_to')
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        query = select(RentalBuilding).where(RentalBuilding.landlord_id == landlord_id)
+        property_type_id = request.args.get('property_type_id', type=int)
+        if property_type_id:
+            query = query.where(RentalBuilding.property_type_id == property_type_id)
+        if starting_from:
+            query = query.where(RentalBuilding.starting_date >= starting_from)
+        if starting_to:
+            query = query.where(RentalBuilding.starting_date <= starting_to)
+
+        try:
+            buildings, next_cursor = paginate(query, (RentalBuilding.id,), (int,), request.args.get('cursor'), limit)
+        except CursorError as e:
+            return {'error': str(e)}, 400
+
+        with instrumentation.timed('serialize'):
+            items = RentalBuildingSchema(many=True, only=RENTAL_BUILDING_FIELDS).dump(buildings)
+        return {'items': items, 'next_cursor': next_cursor}, 200
+
+
+class RentalBuildingOccupancy(Resource):
+    def get(self, kind):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+        if kind not in occupancy.QUERIES:
+            return {'error': f"occupancy query must be one of {', '.join(occupancy.QUERIES)}"}, 404
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            window_from, window_to = occupancy.window(
+                parse_date(request.args.get('from'), 'from'), parse_date(request.args.get('to'), 'to')
+            )
+            query, columns, types = occupancy.occupancy_query(
+                kind, landlord_id, window_from, window_to, request.args.get('property_type_id', type=int)
+            )
+            buildings, next_cursor = paginate(query, columns, types, request.args.get('cursor'), limit)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        with instrumentation.timed('serialize'):
+            items = RentalBuildingSchema(many=True, only=RENTAL_BUILDING_FIELDS).dump(buildings)
+        return {
+            'items': items,
+            'next_cursor': next_cursor,
+            'from': window_from.isoformat(),
+            'to': window_to.isoformat(),
+        }, 200
+
+
+class RentalBuildingsByPropertyType(Resource):
+    def get(self, type_name):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            buildings, next_cursor = paginate(
+                buildings_by_property_type(landlord_id, type_name).order_by(None),
+                (RentalBuilding.id,), (int,), request.args.get('cursor'), limit
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        with instrumentation.timed('serialize'):
+            items = RentalBuildingSchema(many=True, only=RENTAL_BUILDING_FIELDS).dump(buildings)
+        return {'items': items, 'next_cursor': next_cursor}, 200
+
+
+class PropertyTypeCounts(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        rows = db.session.execute(property_type_counts(landlord_id))
+        return {
+            'items': [
+                {'property_type_id': type_id, 'property_type_name': name, 'rental_buildings': count}
+                for type_id, name, count in rows
+            ]
+        }, 200
+
+
+class TenantList(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        query = select(Tenant).where(Tenant.landlord_id == landlord_id)
+
+        try:
+            tenants, next_cursor = paginate(query, (Tenant.id,), (int,), request.args.get('cursor'), limit)
+        except CursorError as e:
+            return {'error': str(e)}, 400
+
+        with instrumentation.timed('serialize'):
+            items = TenantSchema(many=True, only=TENANT_FIELDS).dump(tenants)
+        return {'items': items, 'next_cursor': next_cursor}, 200
+
+
+class PaymentList(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            due_from = parse_date(request.args.get('due_from'), 'due_from')
+            due_to = parse_date(request.args.get('due_to'), 'due_to')
+            period_from = request.args.get('period_from')
+            period_from = period_to_month(period_from) if period_from else None
+            period_to = request.args.get('period_to')
+            period_to = period_to_month(period_to) if period_to else None
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        query = select(Payment).where(Payment.landlord_id == landlord_id)
+        rental_building_id = request.args.get('rental_building_id', type=int)
+        if rental_building_id:
+            query = query.where(Payment.rental_building_id == rental_building_id)
+        property_type_id = request.args.get('property_type_id', type=int)
+        if property_type_id:
+            query = (
+                query.join(RentalBuilding, Payment.rental_building_id == RentalBuilding.id)
+                .where(RentalBuilding.property_type_id == property_type_id)
+            )
+        if due_from:
+            query = query.where(Payment.due_date >= due_from)
+        if due_to:
+            query = query.where(Payment.due_date <= due_to)
+        if period_from:
+            query = query.where(Payment.period_month >= period_from)
+        if period_to:
+            query = query.where(Payment.period_month <= period_to)
+
+        try:
+            payments, next_cursor = paginate(query, (Payment.due_date, Payment.id), (date, int), request.args.get('cursor'), limit)
+        except CursorError as e:
+            return {'error': str(e)}, 400
+
+        with instrumentation.timed('serialize'):
+            items = PaymentSchema(many=True).dump(payments)
+        return {'items': items, 'next_cursor': next_cursor}, 200
+
+
+class GeneratePayments(Resource):
+    def post(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        data = request.get_json(silent=True) or {}
+        payment_period = data.get('payment_period')
+        if not payment_period or not isinstance(payment_period, str):
+            return {'error': 'payment_period is required and must be a string'}, 400
+        try:
+            result = billing.generate_payments(payment_period, landlord_id)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return result, 201 if result['created'] else 200
+
+
+class OverduePaymentList(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            payments, next_cursor = paginate(
+                overdue.overdue_query(landlord_id),
+                (OverduePayment.due_date, OverduePayment.payment_id), (date, int), request.args.get('cursor'), limit
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        with instrumentation.timed('serialize'):
+            items = OverduePaymentSchema(many=True).dump(payments)
+        as_of = overdue.watermark()
+        return {'items': items, 'next_cursor': next_cursor, 'as_of': as_of.isoformat() if as_of else None}, 200
+
+
+REPORTS = {
+    'rent_roll': reports.rent_roll,
+    'arrears': reports.arrears_by_tenant,
+    'late_payments': reports.late_payments,
+    'collections': reports.collections_by_building,
+}
+
+
+class Changes(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        since = request.args.get('since')
+        try:
+            since = int(since) if since is not None else None
+        except ValueError:
+            return {'error': 'since must be an integer'}, 400
+        if since is not None and since < 0:
+            return {'error': 'since must not be negative'}, 400
+        try:
+            limit = parse_limit(request.args.get('limit', changefeed.DEFAULT_LIMIT))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return changefeed.changes_since(landlord_id, since, limit), 200
+
+
+class Stats(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        counts = stats.for_landlord(landlord_id)
+        if counts is None:
+            return {'error': 'landlord not found'}, 404
+        return counts, 200
+
+
+class Report(Resource):
+    def get(self, name):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+        if name not in REPORTS:
+            return {'error': 'report not found'}, 404
+
+        try:
+            period_from = request.args.get('period_from')
+            period_from = period_to_month(period_from) if period_from else None
+            period_to = request.args.get('period_to')
+            period_to = period_to_month(period_to) if period_to else None
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return {'items': REPORTS[name](landlord_id, period_from, period_to)}, 200
+
+
+class Search(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        kind = request.args.get('type')
+        if kind and kind not in search.KINDS:
+            return {'error': f"type must be one of {', '.join(search.KINDS)}"}, 400
+        try:
+            limit = parse_limit(request.args.get('limit', search.DEFAULT_LIMIT))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return search.search(landlord_id, request.args.get('q', ''), [kind] if kind else None, limit), 200
+
+
+class BulkImport(Resource):
+    def post(self, kind):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+        if kind not in bulk_import.MODELS:
+            return {'error': 'import kind not found'}, 404
+
+        fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'jsonl')
+        text = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        try:
+            result = bulk_import.import_rows(kind, landlord_id, bulk_import.read_rows(text, fmt))
+        except (bulk_import.BulkImportError, csv.Error, UnicodeDecodeError) as e:
+            return {'error': str(e)}, 400
+
+        return result, 201 if result['inserted'] else 400
+
+
+class Batch(Resource):
+    method_decorators = [idempotency.idempotent]
+
+    def post(self):
+        try:
+            operations = batch.parse_operations(
+                request.get_json(silent=True), current_app.config.get('BATCH_MAX_OPERATIONS', 50)
+            )
+        except batch.BatchError as e:
+            return {'error': str(e)}, 400
+
+        result = batch.run(operations)
+        if not result['committed']:
+            return result, result['results'][-1]['status']
+        return result, 200
+
+
+class HashingMetrics(Resource):
+    def get(self):
+        return hashing.metrics.snapshot(), 200
+
+
+class RequestMetrics(Resource):
+    def get(self):
+        return instrumentation.metrics.snapshot(), 200
+
+
+class PortfolioExport(Resource):
+    def get(self):
+        landlord_id = session.get('landlord_id')
+        if not landlord_id:
+            return {'error': 'unauthorized'}, 401
+
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in ('ndjson', 'json'):
+            return {'error': 'format must be ndjson or json'}, 400
+        chunks = export.stream_portfolio(landlord_id, fmt)
+        if chunks is None:
+            return {'error': 'landlord not found'}, 404
+
+        mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+        return Response(stream_with_context(chunks), mimetype=mimetype)
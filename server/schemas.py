@@ -0,0 +1,98 @@
+from marshmallow import fields
+
+from server.extensions import ma
+from server.models import Landlord, Tenant, RentalBuilding, PropertyType, Payment, OverduePayment
+
+# Kept out of server.models: building the auto schemas reflects every column,
+# and migrations, CLI commands and background jobs never serialize anything.
+
+
+class LandlordSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Landlord
+        load_instance = True
+        include_relationship = True
+        exclude = ('password_hash',)
+
+    id = ma.auto_field()
+    username = ma.auto_field()
+    password = fields.String(load_only=True)
+
+    tenants = ma.Nested('TenantSchema', many=True, only=('id', 'first_name', 'last_name', 'telephone', 'occupation', 'landlord_id'))
+    rental_buildings = ma.Nested('RentalBuildingSchema', many=True, only=('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id', 'payments'))
+    property_types = ma.Nested('PropertyTypeSchema', many=True, only=('id', 'property_type_name'))
+
+
+class TenantSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Tenant
+        include_relationship = True
+        load_instance = True
+
+    id = ma.auto_field()
+    first_name = ma.auto_field()
+    last_name = ma.auto_field()
+    occupation = ma.auto_field()
+    landlord_id = ma.auto_field()
+
+    landlord = ma.Nested('LandlordSchema', only=('id','username'))
+    rental_buildings = ma.Nested('RentalBuildingSchema', many=True, only=('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id', 'tenant'))
+
+
+class RentalBuildingSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = RentalBuilding
+        include_relationship = True
+        load_instance = True
+
+    id = ma.auto_field()
+    address = ma.auto_field()
+    starting_date = ma.Date(format='%Y-%m-%d')
+    ending_date = ma.Date(format='%Y-%m-%d')
+    landlord_id = ma.auto_field()
+    tenant_id = ma.auto_field()
+    property_type_id = ma.auto_field()
+
+    landlord = ma.Nested('LandlordSchema', only=('id', 'username'))
+    tenant = ma.Nested('TenantSchema', only=('id', 'first_name', 'last_name', 'telephone', 'occupation', 'landlord_id'))
+    property_type = ma.Nested('PropertyTypeSchema', only=('id','property_type_name'))
+    payments = ma.Nested('PaymentSchema', many=True)
+
+class PropertyTypeSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = PropertyType
+        load_instance = True
+        include_relationship = True
+
+    id = ma.auto_field()
+    property_type_name = ma.auto_field()
+
+    rental_buildings = ma.Nested('RentalBuildingSchema', many=True, only=('id', 'address', 'starting_date', 'ending_date', 'landlord_id', 'tenant_id', 'property_type_id'))
+    landlords = ma.Nested('LandlordSchema', many=True, only=('id', 'username'))
+
+
+class PaymentSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Payment
+        load_instance = True
+        include_relationship = True
+        exclude = ('period_month', 'landlord_id')
+
+    id = ma.auto_field()
+    monthly_price = ma.auto_field()
+    price = ma.auto_field()
+    payment_status = ma.auto_field()
+    payment_date = ma.Date(format='%Y-%m-%d')
+    due_date = ma.Date(format='%Y-%m-%d')
+    payment_period = fields.String()
+    rental_building_id = ma.auto_field()
+
+   
+
+
+class OverduePaymentSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = OverduePayment
+        include_fk = True
+
+    due_date = ma.Date(format='%Y-%m-%d')
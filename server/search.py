@@ -0,0 +1,101 @@
+import re
+
+from sqlalchemy import DDL, event, text
+
+from server.extensions import db
+from server.models import RentalBuilding, Tenant
+
+# External-content FTS5 tables: the text stays in rental_buildings/tenants and
+# the index holds only tokens. landlord_id is indexed as a token too, so the
+# landlord scope is a posting-list intersection inside FTS rather than a
+# filter over every prefix match. prefix='2 3 4' keeps short autocomplete
+# prefixes off the full term scan.
+#
+# Results come back in rowid order rather than by bm25: ranking needs the
+# document frequency of every matched prefix across all landlords, which
+# means reading whole doclists and costs tens of ms at a million rows.
+FTS_TABLES = {
+    'rental_buildings': ('rental_buildings_fts', ('address', 'landlord_id')),
+    'tenants': ('tenants_fts', ('first_name', 'last_name', 'occupation', 'telephone', 'landlord_id')),
+}
+KINDS = {
+    'rental_building': ('rental_buildings_fts', ('address',)),
+    'tenant': ('tenants_fts', ('first_name', 'last_name', 'occupation', 'telephone')),
+}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_TERMS = 8
+TOKEN = re.compile(r'\w+')
+
+
+def fts_ddl(table):
+    """CREATE statements for table's FTS index and the triggers keeping it in sync."""
+    fts, columns = FTS_TABLES[table]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});'
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', prefix='2 3 4')",
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END',
+    ]
+
+
+# Tables made by db.create_all() (seed, benchmarks) get the same index the
+# migration creates.
+for _model in (RentalBuilding, Tenant):
+    _table = _model.__tablename__
+    for _statement in fts_ddl(_table):
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    event.listen(
+        _model.__table__, 'before_drop',
+        DDL(f'DROP TABLE IF EXISTS {FTS_TABLES[_table][0]}').execute_if(dialect='sqlite')
+    )
+
+
+def match_expression(q, landlord_id, columns):
+    """
+    Turn free text into an FTS5 query: every word is a quoted prefix term
+    (so user input never reaches the FTS5 syntax), all of them required,
+    searched in columns only and scoped by the landlord_id token.
+    """
+    terms = TOKEN.findall(q)[:MAX_TERMS]
+    if not terms:
+        return None
+    words = ' '.join(f'"{term}"*' for term in terms)
+    return f'landlord_id : {int(landlord_id)} AND {{{" ".join(columns)}}} : ({words})'
+
+
+def search(landlord_id, q, kinds=None, limit=DEFAULT_LIMIT):
+    """First limit matches per kind, e.g. {'rental_building': [...], 'tenant': [...]}."""
+    limit = min(limit, MAX_LIMIT)
+    results = {}
+    for kind in kinds or KINDS:
+        fts, columns = KINDS[kind]
+        expression = match_expression(q, landlord_id, columns)
+        if expression is None:
+            results[kind] = []
+            continue
+        rows = db.session.execute(
+            text(f'SELECT rowid AS id, {", ".join(columns)} FROM {fts} WHERE {fts} MATCH :q ORDER BY rowid LIMIT :limit'),
+            {'q': expression, 'limit': limit},
+        )
+        results[kind] = [dict(row._mapping) for row in rows]
+    return results
+
+
+def rebuild():
+    # Repopulates both indexes from the content tables, e.g. after a bulk load with triggers off.
+    for fts, _ in FTS_TABLES.values():
+        db.session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def register(app):
+    @app.cli.command('rebuild-search')
+    def rebuild_search_command():
+        """Rebuild the full-text search indexes from rental_buildings and tenants."""
+        rebuild()
@@ -84,10 +84,11 @@ from datetime import datetime, date
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from server.app import app
+from server.app import create_app
 from server.models import db, Landlord, Tenant, RentalBuilding, PropertyType, Payment
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         print("🏢 Starting seed...")
 
@@ -0,0 +1,133 @@
+from collections import defaultdict
+
+from marshmallow import fields
+from sqlalchemy import select
+
+from server import loaders
+from server.extensions import db
+from server.models import Landlord, Payment
+from server.schemas import LandlordSchema, PaymentSchema
+
+# Field types whose marshmallow output is the attribute value itself for the
+# column types they're bound to here.
+PASSTHROUGH = (fields.Integer, fields.String, fields.Boolean)
+
+
+def _date_formatter(fmt):
+    if fmt in (None, 'iso', '%Y-%m-%d'):
+        # isoformat() zero-pads years below 1000, strftime('%Y') does not
+        return lambda d: d.isoformat() if d.year >= 1000 else d.strftime(fmt or '%Y-%m-%d')
+    return lambda d: d.strftime(fmt)
+
+
+class CompiledSchema:
+    """
+    Dumps objects the way schema_cls(only=only) would, with the per-field
+    dispatch resolved once up front. Nested fields named in prefetched are
+    read from a caller-supplied {name: {parent id: [dicts]}} mapping instead
+    of the relationship.
+    """
+
+    def __init__(self, schema_cls, only=None, prefetched=()):
+        self.schema = schema_cls(only=only)
+        self.prefetched = prefetched
+        self.fields = []
+        for name, field in self.schema.dump_fields.items():
+            key = field.data_key or name
+            attr = field.attribute or name
+            if isinstance(field, fields.Nested):
+                nested = CompiledSchema(loaders.nested_schema(field), field.only, prefetched)
+                if name in prefetched:
+                    self.fields.append((key, attr, 'prefetched', None))
+                else:
+                    self.fields.append((key, attr, 'nested', nested.dump_many if field.many else nested.dump))
+            elif isinstance(field, fields.Date) and not isinstance(field, fields.DateTime):
+                self.fields.append((key, attr, 'format', _date_formatter(field.format)))
+            elif type(field) in PASSTHROUGH:
+                self.fields.append((key, attr, 'value', None))
+            else:
+                self.fields.append((key, attr, 'field', field))
+
+    def dump(self, obj, context=None):
+        if obj is None:
+            return None
+        out = {}
+        for key, attr, kind, fn in self.fields:
+            if kind == 'prefetched':
+                out[key] = context[attr].get(obj.id, [])
+                continue
+            if kind == 'field':
+                out[key] = fn.serialize(attr, obj)
+                continue
+            value = getattr(obj, attr, None)
+            if value is None or kind == 'value':
+                out[key] = value
+            elif kind == 'nested':
+                out[key] = fn(value, context)
+            else:
+                out[key] = fn(value)
+        return out
+
+    def dump_many(self, objs, context=None):
+        return [self.dump(obj, context) for obj in objs]
+
+
+class RowSerializer:
+    # Dicts straight from row tuples: no ORM identity map, no schema. Only the
+    # scalar fields of the schema are selected; nested ones are the caller's job.
+
+    def __init__(self, model, schema_cls, only=None):
+        compiled = CompiledSchema(schema_cls, only)
+        scalar = [(key, attr, kind, fn) for key, attr, kind, fn in compiled.fields if kind in ('value', 'format')]
+        self.keys = [key for key, _, _, _ in scalar]
+        self.attrs = [attr for _, attr, _, _ in scalar]
+        self.columns = [getattr(model, attr) for attr in self.attrs]
+        self.formatters = [(i, fn) for i, (_, _, kind, fn) in enumerate(scalar) if kind == 'format']
+
+    def dump(self, row):
+        values = list(row)
+        for i, fn in self.formatters:
+            if values[i] is not None:
+                values[i] = fn(values[i])
+        return dict(zip(self.keys, values))
+
+
+class PaymentRows(RowSerializer):
+
+    def __init__(self):
+        super().__init__(Payment, PaymentSchema)
+        self.building_index = self.attrs.index('rental_building_id')
+
+    def landlord_query(self, landlord_id):
+        return (
+            select(*self.columns)
+            .where(Payment.landlord_id == landlord_id)
+            .order_by(Payment.rental_building_id, Payment.id)
+        )
+
+    def by_building(self, landlord_id):
+        dump, building_index = self.dump, self.building_index
+        grouped = defaultdict(list)
+        for row in db.session.execute(self.landlord_query(landlord_id)):
+            grouped[row[building_index]].append(dump(row))
+        return grouped
+
+
+_landlord = None
+_payments = None
+
+
+def dump_landlord(landlord_id):
+    global _landlord, _payments
+    if _landlord is None:
+        _landlord = CompiledSchema(LandlordSchema, prefetched=('payments',))
+        _payments = PaymentRows()
+
+    landlord = db.session.execute(
+        select(Landlord)
+        .where(Landlord.id == landlord_id)
+        .options(*loaders.eager_options(LandlordSchema, Landlord, skip=('payments',)))
+    ).scalar_one_or_none()
+    if landlord is None:
+        return None
+    return _landlord.dump(landlord, {'payments': _payments.by_building(landlord_id)})
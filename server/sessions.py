@@ -0,0 +1,180 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+# the key login and signup set; a session whose value for it changes gets a new sid
+IDENTITY_KEY = 'landlord_id'
+
+
+class ServerSession(CallbackDict, SessionMixin):
+
+    def __init__(self, initial=None, sid=None, new=False, expiry=None):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expiry = expiry
+        self.modified = False
+        self.identity = self.get(IDENTITY_KEY)
+
+
+class SessionStore:
+    # SQLite is the source of truth; a bounded LRU of decoded sessions sits in
+    # front of it so a warm lookup never leaves the process. The cache assumes a
+    # session is only written by the process serving it, so size it to 0 when
+    # requests for one user can land on several workers.
+
+    def __init__(self, path, cache_size=10000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data TEXT NOT NULL, expiry REAL NOT NULL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_expiry ON sessions (expiry)')
+
+    def _remember(self, sid, entry):
+        if not self.cache_size:
+            return
+        self.cache[sid] = entry
+        self.cache.move_to_end(sid)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def get(self, sid, now):
+        with self.lock:
+            entry = self.cache.get(sid)
+            if entry is not None:
+                self.cache.move_to_end(sid)
+            else:
+                row = self.conn.execute('SELECT data, expiry FROM sessions WHERE sid = ?', (sid,)).fetchone()
+                if row is None:
+                    return None
+                entry = (session_json_serializer.loads(row[0]), row[1])
+                self._remember(sid, entry)
+        data, expiry = entry
+        if expiry <= now:
+            return None
+        return dict(data), expiry
+
+    def set(self, sid, data, expiry):
+        data = dict(data)
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO sessions (sid, data, expiry) VALUES (?, ?, ?) '
+                'ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expiry = excluded.expiry',
+                (sid, session_json_serializer.dumps(data), expiry)
+            )
+            self._remember(sid, (data, expiry))
+
+    def delete(self, sid):
+        with self.lock:
+            self.conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+            self.cache.pop(sid, None)
+
+    def sweep(self, now):
+        with self.lock:
+            removed = self.conn.execute('DELETE FROM sessions WHERE expiry <= ?', (now,)).rowcount
+            for sid in [sid for sid, (_, expiry) in self.cache.items() if expiry <= now]:
+                del self.cache[sid]
+        return removed
+
+
+class Sweeper(threading.Thread):
+
+    def __init__(self, store, interval):
+        super().__init__(name='session-sweeper', daemon=True)
+        self.store = store
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.store.sweep(time.time())
+
+    def stop(self):
+        self.stopped.set()
+
+
+class SQLiteSessionInterface(SessionInterface):
+
+    def __init__(self, store, sweep_interval=300):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self.sweeper = None
+        self.sweeper_lock = threading.Lock()
+
+    def _start_sweeper(self):
+        if self.sweeper is not None or not self.sweep_interval:
+            return
+        with self.sweeper_lock:
+            if self.sweeper is None:
+                self.sweeper = Sweeper(self.store, self.sweep_interval)
+                self.sweeper.start()
+
+    def open_session(self, app, request):
+        self._start_sweeper()
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid, time.time())
+            if entry is not None:
+                data, expiry = entry
+                return ServerSession(data, sid=sid, expiry=expiry)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        if not session.new and session.get(IDENTITY_KEY) != session.identity:
+            # Logging in (or out, or as someone else) never keeps the sid the
+            # request came with, so a sid planted before login is worthless.
+            self.store.delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+            session.new = True
+
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        # Rewrite the row only when the data changed or half its lifetime is gone,
+        # so a plain authenticated GET costs no SQLite write.
+        if session.modified or session.new or session.expiry is None or session.expiry - now < lifetime / 2:
+            session.expiry = now + lifetime
+            self.store.set(session.sid, session, session.expiry)
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def init_app(app):
+    store = SessionStore(app.config['SESSION_SQLITE_PATH'], app.config.get('SESSION_CACHE_SIZE', 10000))
+    app.session_interface = SQLiteSessionInterface(store, app.config.get('SESSION_SWEEP_INTERVAL', 300))
+    return app.session_interface
@@ -0,0 +1,251 @@
+import click
+from sqlalchemy import DDL, case, delete, event, func, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from server.extensions import db
+from server.models import Landlord, LandlordStats, Payment, RentalBuilding, Tenant, landlord_property_type
+from server.reports import outstanding
+
+COUNTERS = ('tenants', 'rental_buildings', 'property_types', 'payments', 'unpaid_payments', 'outstanding')
+
+# Triggers rather than an after_flush hook: bulk import, monthly payment
+# generation and the ON CONFLICT creates all write through Core, which the
+# ORM never sees. Each trigger is a single-row UPDATE on landlord_stats.
+
+
+def _payment(row, sign):
+    landlord = f'(SELECT landlord_id FROM rental_buildings WHERE id = {row}.rental_building_id)'
+    owed = (
+        f'CASE WHEN NOT {row}.payment_status THEN {row}.monthly_price '
+        f'WHEN {row}.price < {row}.monthly_price THEN {row}.monthly_price - {row}.price ELSE 0 END'
+    )
+    return (
+        f'UPDATE landlord_stats SET payments = payments {sign} 1, '
+        f'unpaid_payments = unpaid_payments {sign} (NOT {row}.payment_status), '
+        f'outstanding = outstanding {sign} {owed} WHERE landlord_id = {landlord};'
+    )
+
+
+def _count(column, landlord, sign):
+    return f'UPDATE landlord_stats SET {column} = {column} {sign} 1 WHERE landlord_id = {landlord};'
+
+
+def _building_payments(landlord, building, sign):
+    # a building changing hands takes its payments with it
+    owed = (
+        'CASE WHEN NOT payment_status THEN monthly_price '
+        'WHEN price < monthly_price THEN monthly_price - price ELSE 0 END'
+    )
+    return (
+        f'UPDATE landlord_stats SET '
+        f'payments = payments {sign} (SELECT count(*) FROM payments WHERE rental_building_id = {building}), '
+        f'unpaid_payments = unpaid_payments {sign} (SELECT count(*) FROM payments WHERE rental_building_id = {building} AND NOT payment_status), '
+        f'outstanding = outstanding {sign} (SELECT coalesce(sum({owed}), 0) FROM payments WHERE rental_building_id = {building}) '
+        f'WHERE landlord_id = {landlord};'
+    )
+
+
+def _version(landlords):
+    return f'UPDATE landlord_stats SET version = version + 1 WHERE landlord_id IN ({landlords});'
+
+
+def _payment_landlords(*buildings):
+    return f"SELECT landlord_id FROM rental_buildings WHERE id IN ({', '.join(buildings)})"
+
+
+# The version moves inside the writing transaction, so every process sees it
+# change exactly when the data does. Unlike the counters it follows every
+# column, so these fire on any update.
+VERSION_TRIGGERS = {
+    'landlord_stats_version_landlords_au': ('AFTER UPDATE ON landlords', _version('new.id')),
+    'landlord_stats_version_tenants_ai': ('AFTER INSERT ON tenants', _version('new.landlord_id')),
+    'landlord_stats_version_tenants_ad': ('AFTER DELETE ON tenants', _version('old.landlord_id')),
+    'landlord_stats_version_tenants_au': ('AFTER UPDATE ON tenants', _version('old.landlord_id, new.landlord_id')),
+    'landlord_stats_version_rental_buildings_ai': ('AFTER INSERT ON rental_buildings', _version('new.landlord_id')),
+    'landlord_stats_version_rental_buildings_ad': ('AFTER DELETE ON rental_buildings', _version('old.landlord_id')),
+    'landlord_stats_version_rental_buildings_au': (
+        'AFTER UPDATE ON rental_buildings', _version('old.landlord_id, new.landlord_id')
+    ),
+    'landlord_stats_version_payments_ai': (
+        'AFTER INSERT ON payments', _version(_payment_landlords('new.rental_building_id'))
+    ),
+    'landlord_stats_version_payments_ad': (
+        'AFTER DELETE ON payments', _version(_payment_landlords('old.rental_building_id'))
+    ),
+    'landlord_stats_version_payments_au': (
+        'AFTER UPDATE ON payments', _version(_payment_landlords('old.rental_building_id', 'new.rental_building_id'))
+    ),
+    'landlord_stats_version_property_types_ai': ('AFTER INSERT ON landlord_property_type', _version('new.landlord_id')),
+    'landlord_stats_version_property_types_ad': ('AFTER DELETE ON landlord_property_type', _version('old.landlord_id')),
+    'landlord_stats_version_property_type_names_au': (
+        'AFTER UPDATE ON property_types',
+        _version('SELECT landlord_id FROM landlord_property_type WHERE property_type_id = new.id')
+    ),
+}
+
+
+TRIGGERS = {
+    'landlord_stats_landlords_ai': (
+        'AFTER INSERT ON landlords',
+        'INSERT OR IGNORE INTO landlord_stats (landlord_id, tenants, rental_buildings, property_types, payments, '
+        'unpaid_payments, outstanding) VALUES (new.id, 0, 0, 0, 0, 0, 0);'
+    ),
+    'landlord_stats_landlords_ad': (
+        'AFTER DELETE ON landlords',
+        'DELETE FROM landlord_stats WHERE landlord_id = old.id;'
+    ),
+    'landlord_stats_tenants_ai': ('AFTER INSERT ON tenants', _count('tenants', 'new.landlord_id', '+')),
+    'landlord_stats_tenants_ad': ('AFTER DELETE ON tenants', _count('tenants', 'old.landlord_id', '-')),
+    'landlord_stats_tenants_au': (
+        'AFTER UPDATE OF landlord_id ON tenants',
+        _count('tenants', 'old.landlord_id', '-') + ' ' + _count('tenants', 'new.landlord_id', '+')
+    ),
+    'landlord_stats_rental_buildings_ai': (
+        'AFTER INSERT ON rental_buildings', _count('rental_buildings', 'new.landlord_id', '+')
+    ),
+    'landlord_stats_rental_buildings_ad': (
+        'AFTER DELETE ON rental_buildings', _count('rental_buildings', 'old.landlord_id', '-')
+    ),
+    'landlord_stats_rental_buildings_au': (
+        'AFTER UPDATE OF landlord_id ON rental_buildings',
+        ' '.join([
+            _count('rental_buildings', 'old.landlord_id', '-'),
+            _count('rental_buildings', 'new.landlord_id', '+'),
+            _building_payments('old.landlord_id', 'old.id', '-'),
+            _building_payments('new.landlord_id', 'new.id', '+'),
+        ])
+    ),
+    'landlord_stats_property_types_ai': (
+        'AFTER INSERT ON landlord_property_type', _count('property_types', 'new.landlord_id', '+')
+    ),
+    'landlord_stats_property_types_ad': (
+        'AFTER DELETE ON landlord_property_type', _count('property_types', 'old.landlord_id', '-')
+    ),
+    'landlord_stats_payments_ai': ('AFTER INSERT ON payments', _payment('new', '+')),
+    'landlord_stats_payments_ad': ('AFTER DELETE ON payments', _payment('old', '-')),
+    'landlord_stats_payments_au': (
+        'AFTER UPDATE OF payment_status, price, monthly_price, rental_building_id ON payments',
+        _payment('old', '-') + ' ' + _payment('new', '+')
+    ),
+    **VERSION_TRIGGERS,
+}
+
+
+def trigger_ddl():
+    return [f'CREATE TRIGGER {name} {when} BEGIN {body} END' for name, (when, body) in TRIGGERS.items()]
+
+
+# On the metadata rather than one table: the triggers span six tables, all
+# of which have to exist first.
+for _statement in trigger_ddl():
+    event.listen(db.metadata, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+def computed(landlord_ids=None):
+    """The counters recomputed from the base tables, as a select of landlord_id + COUNTERS."""
+    tenants = select(Tenant.landlord_id, func.count().label('n')).group_by(Tenant.landlord_id).subquery()
+    buildings = select(RentalBuilding.landlord_id, func.count().label('n')).group_by(RentalBuilding.landlord_id).subquery()
+    types = (
+        select(landlord_property_type.c.landlord_id, func.count().label('n'))
+        .group_by(landlord_property_type.c.landlord_id)
+        .subquery()
+    )
+    payments = (
+        select(
+            RentalBuilding.landlord_id,
+            func.count(Payment.id).label('n'),
+            func.sum(case((Payment.payment_status.is_(False), 1), else_=0)).label('unpaid'),
+            outstanding.label('outstanding'),
+        )
+        .join(RentalBuilding, Payment.rental_building_id == RentalBuilding.id)
+        .group_by(RentalBuilding.landlord_id)
+        .subquery()
+    )
+    query = (
+        select(
+            Landlord.id,
+            func.coalesce(tenants.c.n, 0),
+            func.coalesce(buildings.c.n, 0),
+            func.coalesce(types.c.n, 0),
+            func.coalesce(payments.c.n, 0),
+            func.coalesce(payments.c.unpaid, 0),
+            func.coalesce(payments.c.outstanding, 0),
+        )
+        .outerjoin(tenants, tenants.c.landlord_id == Landlord.id)
+        .outerjoin(buildings, buildings.c.landlord_id == Landlord.id)
+        .outerjoin(types, types.c.landlord_id == Landlord.id)
+        .outerjoin(payments, payments.c.landlord_id == Landlord.id)
+    )
+    if landlord_ids is not None:
+        query = query.where(Landlord.id.in_(landlord_ids))
+    return query
+
+
+def rebuild(landlord_ids=None):
+    # An upsert rather than delete + insert: version has to keep counting up,
+    # or ETags handed out before the rebuild could match again.
+    db.session.execute(delete(LandlordStats).where(LandlordStats.landlord_id.not_in(select(Landlord.id))))
+    statement = sqlite_insert(LandlordStats).from_select(
+        # the WHERE keeps SQLite from reading ON CONFLICT as a join constraint
+        ['landlord_id', *COUNTERS], computed(landlord_ids).where(true())
+    )
+    result = db.session.execute(statement.on_conflict_do_update(
+        index_elements=['landlord_id'],
+        set_={**{counter: statement.excluded[counter] for counter in COUNTERS}, 'version': LandlordStats.version + 1},
+    ))
+    db.session.commit()
+    return result.rowcount
+
+
+def verify():
+    """[{landlord_id, counter, stored, actual}] wherever landlord_stats has drifted."""
+    stored = {
+        row[0]: row[1:]
+        for row in db.session.execute(select(LandlordStats.landlord_id, *(getattr(LandlordStats, c) for c in COUNTERS)))
+    }
+    drift = []
+    for landlord_id, *actual in db.session.execute(computed()):
+        row = stored.pop(landlord_id, None)
+        if row is None:
+            drift.append({'landlord_id': landlord_id, 'counter': None, 'stored': None, 'actual': 'missing row'})
+            continue
+        for counter, have, want in zip(COUNTERS, row, actual):
+            if have != want:
+                drift.append({'landlord_id': landlord_id, 'counter': counter, 'stored': have, 'actual': want})
+    for landlord_id in stored:
+        drift.append({'landlord_id': landlord_id, 'counter': None, 'stored': 'orphan row', 'actual': None})
+    return drift
+
+
+def for_landlord(landlord_id):
+    # One primary-key read; falls back to counting if the row is missing.
+    row = db.session.get(LandlordStats, landlord_id)
+    if row is not None:
+        return {counter: getattr(row, counter) for counter in COUNTERS}
+    values = db.session.execute(computed([landlord_id])).first()
+    return dict(zip(COUNTERS, values[1:])) if values else None
+
+
+def register(app):
+    @app.cli.group('landlord-stats')
+    def landlord_stats():
+        """Denormalized per-landlord counters."""
+
+    @landlord_stats.command('rebuild')
+    def rebuild_command():
+        """Recompute every landlord's counters from the base tables."""
+        click.echo(f'{rebuild()} landlords rebuilt')
+
+    @landlord_stats.command('verify')
+    @click.option('--fix', is_flag=True, help='Rebuild the landlords that drifted.')
+    def verify_command(fix):
+        """Compare stored counters with the base tables."""
+        drift = verify()
+        for entry in drift:
+            click.echo(f"landlord {entry['landlord_id']} {entry['counter'] or ''}: stored {entry['stored']}, actual {entry['actual']}")
+        if not drift:
+            click.echo('no drift')
+        elif fix:
+            click.echo(f"{rebuild(sorted({entry['landlord_id'] for entry in drift}))} landlords rebuilt")
+        else:
+            raise click.ClickException(f'{len(drift)} counters drifted')
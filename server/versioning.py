@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from server.extensions import db
+from server.models import LandlordStats
+
+# The version is landlord_stats.version, which the triggers in server/stats.py
+# bump inside every transaction that writes a landlord's data. It is the same
+# in every worker and moves exactly when the write commits, so an ETag or a
+# cached payload can't outlive the data it was built from.
+CACHE_SIZE = 1024
+# session.info key for payloads built inside a batch, see server.batch
+PENDING = 'pending_payloads'
+
+_lock = threading.Lock()
+_payloads = OrderedDict()
+
+
+def version(landlord_id):
+    """The landlord's current version, None if it has no landlord_stats row."""
+    return db.session.scalar(select(LandlordStats.version).where(LandlordStats.landlord_id == landlord_id))
+
+
+def etag(landlord_id, current, view=None):
+    return f'{landlord_id}-{current}-{view or "full"}'
+
+
+def cached_payload(landlord_id, view, current, build):
+    # Payloads are keyed by version, so a bump makes the old entry unreachable
+    # and it simply ages out of the LRU. current has to be read before build
+    # runs: a write landing in between then leaves newer data under an older
+    # version, which only costs a refetch, never a stale 304.
+    #
+    # Inside a batch, current and the data are uncommitted: the payload is
+    # held in the session until the batch commits, and dropped if it doesn't.
+    key = (landlord_id, view, current)
+    pending = db.session.info.get(PENDING)
+    if pending is not None and key in pending:
+        return pending[key]
+    with _lock:
+        if key in _payloads:
+            _payloads.move_to_end(key)
+            return _payloads[key]
+    payload = build()
+    if payload is not None:
+        if pending is not None:
+            pending[key] = payload
+        else:
+            publish({key: payload})
+    return payload
+
+
+def publish(payloads):
+    with _lock:
+        _payloads.update(payloads)
+        for key in payloads:
+            _payloads.move_to_end(key)
+        while len(_payloads) > CACHE_SIZE:
+            _payloads.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _payloads.clear()
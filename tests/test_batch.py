@@ -0,0 +1,105 @@
+import threading
+from datetime import date
+
+import pytest
+
+from server import batch, versioning
+from server.app import create_app
+from server.extensions import db
+from server.models import Landlord, PropertyType
+
+PASSWORD = 'Password123!'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'SESSION_SQLITE_PATH': str(tmp_path / 'sessions.db'),
+        'IDEMPOTENCY_SQLITE_PATH': str(tmp_path / 'idempotency.db'),
+        'BCRYPT_LOG_ROUNDS': 4,
+        'BCRYPT_WORKERS': 0,
+        'SESSION_SWEEP_INTERVAL': 0,
+        'OVERDUE_INTERVAL': 0,
+        'CHANGES_COMPACT_INTERVAL': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        landlord = Landlord(username='JohnDoe')
+        landlord.password = PASSWORD
+        landlord.property_types.append(PropertyType(property_type_name='Apartment'))
+        db.session.add(landlord)
+        db.session.commit()
+    versioning.clear()
+    yield app
+    versioning.clear()
+
+
+def login(app):
+    client = app.test_client()
+    response = client.post('/login', json={'username': 'JohnDoe', 'password': PASSWORD})
+    assert response.status_code == 200
+    return client
+
+
+def new_building(address):
+    return {
+        'method': 'POST',
+        'path': '/rental_buildings/new',
+        'body': {
+            'address': address,
+            'starting_date': date(2024, 1, 1).isoformat(),
+            'ending_date': date(2025, 1, 1).isoformat(),
+            'property_type_id': 1,
+        },
+    }
+
+
+def addresses(payload):
+    return {building['address'] for building in payload['rental_buildings']}
+
+
+def test_failed_batch_leaves_no_cached_payload(app):
+    client = login(app)
+    operations = [new_building('1 Batch Rd'), {'method': 'GET', 'path': '/check_session'}, new_building('1 Batch Rd')]
+
+    response = client.post('/batch', json={'operations': operations})
+
+    assert response.json['committed'] is False
+    assert response.json['failed'] == 2
+    # the batch itself saw its uncommitted building
+    assert '1 Batch Rd' in addresses(response.json['results'][1]['body'])
+    assert '1 Batch Rd' not in addresses(client.get('/check_session').json)
+
+    # the next write lands on the version the rolled-back batch had reached
+    assert client.post('/rental_buildings/new', json=new_building('2 Real Rd')['body']).status_code == 201
+    assert addresses(client.get('/check_session').json) == {'2 Real Rd'}
+
+
+def test_read_during_batch_is_not_served_after_commit(app, monkeypatch):
+    client = login(app)
+    reader = login(app)
+    seen = []
+    dispatch = batch._dispatch
+
+    def read_between_operations(*args):
+        result = dispatch(*args)
+        if not seen:
+            # another worker thread reading while the batch is uncommitted
+            thread = threading.Thread(target=lambda: seen.append(reader.get('/check_session')))
+            thread.start()
+            thread.join()
+        return result
+
+    monkeypatch.setattr(batch, '_dispatch', read_between_operations)
+    response = client.post('/batch', json={'operations': [new_building('3 Batch Rd'), {'method': 'GET', 'path': '/stats'}]})
+
+    assert response.json['committed'] is True
+    during, = seen
+    assert during.status_code == 200
+    assert '3 Batch Rd' not in addresses(during.json)
+
+    after = reader.get('/check_session', headers={'If-None-Match': during.headers['ETag']})
+    assert after.status_code == 200
+    assert '3 Batch Rd' in addresses(after.json)
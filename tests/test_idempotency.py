@@ -0,0 +1,75 @@
+import pytest
+
+from server.app import create_app
+from server.extensions import db
+from server.idempotency import PENDING, IdempotencyStore
+
+PASSWORD = 'Password123!'
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'idempotency.db')
+
+
+def test_concurrent_retry_cannot_replace_a_stored_response(path):
+    # two workers, each with its own connection and cache
+    first, second = IdempotencyStore(path), IdempotencyStore(path)
+
+    assert first.claim('key', 'body', 100)
+    assert not second.claim('key', 'body', 100)
+    assert second.get('key', 100)[1] == PENDING
+
+    first.set('key', 'body', 201, {'id': 1}, {}, 100)
+    second.set('key', 'body', 400, {'error': 'username already exists'}, {}, 100)
+
+    assert second.get('key', 101)[:3] == ('body', 201, {'id': 1})
+    assert IdempotencyStore(path).get('key', 101)[:3] == ('body', 201, {'id': 1})
+
+
+def test_released_claim_can_be_retried(path):
+    store = IdempotencyStore(path)
+
+    assert store.claim('key', 'body', 100)
+    store.release('key')
+
+    assert store.get('key', 100) is None
+    assert store.claim('key', 'body', 100)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'SESSION_SQLITE_PATH': str(tmp_path / 'sessions.db'),
+        'IDEMPOTENCY_SQLITE_PATH': str(tmp_path / 'idempotency.db'),
+        'BCRYPT_LOG_ROUNDS': 4,
+        'BCRYPT_WORKERS': 0,
+        'SESSION_SWEEP_INTERVAL': 0,
+        'OVERDUE_INTERVAL': 0,
+        'CHANGES_COMPACT_INTERVAL': 0,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+
+
+def test_signup_retried_after_a_lost_response_is_replayed(app):
+    signup = {'username': 'JohnDoe', 'password': PASSWORD, 'confirmed_password': PASSWORD}
+    headers = {'Idempotency-Key': 'signup-1'}
+
+    # the response, and the session cookie with it, never reaches the client
+    assert app.test_client().post('/signup', json=signup, headers=headers).status_code == 201
+
+    client = app.test_client()
+    retry = client.post('/signup', json=signup, headers=headers)
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert client.get('/check_session').status_code == 200
+
+    # the same key with other credentials gets neither the response nor the login
+    other = app.test_client()
+    reused = other.post('/signup', json={**signup, 'password': 'Other123!', 'confirmed_password': 'Other123!'}, headers=headers)
+    assert reused.status_code == 422
+    assert other.get('/check_session').status_code == 401
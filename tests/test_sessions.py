@@ -0,0 +1,49 @@
+import pytest
+
+from server.app import create_app
+from server.extensions import db
+from server.models import Landlord
+
+PASSWORD = 'Password123!'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'SESSION_SQLITE_PATH': str(tmp_path / 'sessions.db'),
+        'IDEMPOTENCY_SQLITE_PATH': str(tmp_path / 'idempotency.db'),
+        'BCRYPT_LOG_ROUNDS': 4,
+        'BCRYPT_WORKERS': 0,
+        'SESSION_SWEEP_INTERVAL': 0,
+        'OVERDUE_INTERVAL': 0,
+        'CHANGES_COMPACT_INTERVAL': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        for username in ('JohnDoe', 'JaneDoe'):
+            landlord = Landlord(username=username)
+            landlord.password = PASSWORD
+            db.session.add(landlord)
+        db.session.commit()
+    yield app
+
+
+def login(client, username):
+    response = client.post('/login', json={'username': username, 'password': PASSWORD})
+    assert response.status_code == 200
+    return client.get_cookie('session').value
+
+
+def test_login_rotates_the_session_id(app):
+    client = app.test_client()
+    planted = login(client, 'JohnDoe')
+
+    # whoever held the earlier sid doesn't get the new login
+    assert login(client, 'JaneDoe') != planted
+    assert client.get('/check_session').json['username'] == 'JaneDoe'
+
+    stale = app.test_client()
+    stale.set_cookie('session', planted)
+    assert stale.get('/check_session').status_code == 401